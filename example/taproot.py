@@ -24,15 +24,10 @@ mast = pabtc.core.TapNode(
 class Tp2trp2pk:
     def __init__(self, pubkey: pabtc.core.PubKey):
         self.pubkey = pubkey
-        self.addr = pabtc.core.address_p2tr(pubkey, mast.hash)
+        self.addr, _, parity = pabtc.core.address_p2tr_output(pubkey, mast.hash)
         self.script = pabtc.core.script_pubkey_p2tr(self.addr)
-        output_pubkey_byte = bytearray([0x02]) + pabtc.bech32.decode(pabtc.config.current.prefix.bech32, 1, self.addr)
-        output_pubkey = pabtc.core.PubKey.sec_decode(output_pubkey_byte)
         # Control byte with leaf version and parity bit.
-        if output_pubkey.y & 1:
-            self.prefix = 0xc1
-        else:
-            self.prefix = 0xc0
+        self.prefix = 0xc0 | parity
 
     def sign(self, tx: pabtc.core.Transaction):
         for i, e in enumerate(tx.vin):
@@ -51,15 +46,10 @@ class Tp2trp2pk:
 class Tp2trp2ms:
     def __init__(self, pubkey: pabtc.core.PubKey):
         self.pubkey = pubkey
-        self.addr = pabtc.core.address_p2tr(pubkey, mast.hash)
+        self.addr, _, parity = pabtc.core.address_p2tr_output(pubkey, mast.hash)
         self.script = pabtc.core.script_pubkey_p2tr(self.addr)
-        output_pubkey_byte = bytearray([0x02]) + pabtc.bech32.decode(pabtc.config.current.prefix.bech32, 1, self.addr)
-        output_pubkey = pabtc.core.PubKey.sec_decode(output_pubkey_byte)
         # Control byte with leaf version and parity bit.
-        if output_pubkey.y & 1:
-            self.prefix = 0xc1
-        else:
-            self.prefix = 0xc0
+        self.prefix = 0xc0 | parity
 
     def sign(self, tx: pabtc.core.Transaction):
         for i, e in enumerate(tx.vin):
@@ -12,7 +12,18 @@
 
 # Base58 encoding and decoding
 
+import hashlib
+import typing
+
 B58_DIGITS = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+# Reverse lookup table from a character to its digit value.
+B58_INDEX = {c: i for i, c in enumerate(B58_DIGITS)}
+# Numbers are converted 10 digits at a time, so there is one big integer operation per 10 digits instead of per digit.
+# 58**10 fits in a machine word, so the work inside a chunk is on small integers.
+B58_CHUNK_SIZE = 10
+B58_CHUNK = 58 ** B58_CHUNK_SIZE
+# Two digit strings for all values below 58**2.
+B58_PAIR = [a + b for a in B58_DIGITS for b in B58_DIGITS]
 
 
 def encode(b: bytearray) -> str:
@@ -20,20 +31,17 @@ def encode(b: bytearray) -> str:
     assert isinstance(b, bytearray)
     # Convert big-endian bytes to integer
     n = int.from_bytes(b)
-    # Divide that integer into bas58
+    # Divide that integer into base58, one chunk of digits at a time, and each chunk two digits at a time.
     res = []
     while n > 0:
-        n, r = divmod(n, 58)
-        res.append(B58_DIGITS[r])
-    res = ''.join(res[::-1])
+        n, r = divmod(n, B58_CHUNK)
+        for _ in range(B58_CHUNK_SIZE // 2):
+            r, d = divmod(r, 58 * 58)
+            res.append(B58_PAIR[d])
+    # Strip the zero digits of the last chunk.
+    res = ''.join(res[::-1]).lstrip(B58_DIGITS[0])
     # Encode leading zeros as base58 zeros
-    czero = 0
-    pad = 0
-    for c in b:
-        if c == czero:
-            pad += 1
-        else:
-            break
+    pad = len(b) - len(b.lstrip(b'\x00'))
     return B58_DIGITS[0] * pad + res
 
 
@@ -41,20 +49,41 @@ def decode(s: str) -> bytearray:
     # Decode a base58-encoding string, returning bytes.
     if not s:
         return bytearray()
-    # Convert the string to an integer
+    # Convert the string to an integer, one chunk of digits at a time.
     n = 0
-    for c in s:
-        n *= 58
-        assert c in B58_DIGITS
-        digit = B58_DIGITS.index(c)
-        n += digit
+    for i in range(0, len(s), B58_CHUNK_SIZE):
+        chunk = s[i:i+B58_CHUNK_SIZE]
+        r = 0
+        for c in chunk:
+            assert c in B58_INDEX
+            r = r * 58 + B58_INDEX[c]
+        n = n * (B58_CHUNK if len(chunk) == B58_CHUNK_SIZE else 58 ** len(chunk)) + r
     # Convert the integer to bytes
     res = bytearray(n.to_bytes(max((n.bit_length() + 7) // 8, 1)))
     # Add padding back.
-    pad = 0
-    for c in s[:-1]:
-        if c == B58_DIGITS[0]:
-            pad += 1
-        else:
-            break
+    pad = len(s[:-1]) - len(s[:-1].lstrip(B58_DIGITS[0]))
     return bytearray(pad) + res
+
+
+def check_encode(b: bytearray) -> str:
+    # Base58Check, the payload followed by the first four bytes of its double sha256.
+    chk4 = hashlib.sha256(hashlib.sha256(b).digest()).digest()[:4]
+    return encode(b + chk4)
+
+
+def check_decode(s: str) -> bytearray:
+    # Decode a Base58Check string and verify its checksum, returning the payload.
+    data = decode(s)
+    assert len(data) >= 4
+    assert hashlib.sha256(hashlib.sha256(data[:-4]).digest()).digest()[:4] == data[-4:]
+    return data[:-4]
+
+
+def check_encode_many(b: typing.List[bytearray]) -> typing.List[str]:
+    # Base58Check encode many payloads, e.g. when exporting an address pool.
+    return [check_encode(e) for e in b]
+
+
+def check_decode_many(s: typing.List[str]) -> typing.List[bytearray]:
+    # Base58Check decode many strings, e.g. the addresses of a withdrawal file. Every checksum is verified.
+    return [check_decode(e) for e in s]
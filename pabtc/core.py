@@ -1,9 +1,15 @@
 import base64
+import collections
+import concurrent.futures
+import functools
 import hashlib
 import itertools
 import math
 import io
 import json
+import os
+import socket
+import struct
 import typing
 import pabtc.base58
 import pabtc.bech32
@@ -23,10 +29,37 @@ sighash_single = 0x03
 sighash_anyone_can_pay = 0x80
 
 
+def hash160_backend_detect() -> str:
+    # Ripemd160 from openssl is much faster, but it is a legacy algorithm and some openssl 3 builds do not provide it.
+    try:
+        hashlib.new('ripemd160')
+        return 'openssl'
+    except ValueError:
+        return 'pabtc'
+
+
+# The ripemd160 implementation used by hash160, either 'openssl' or 'pabtc'.
+hash160_backend = hash160_backend_detect()
+
+
 def hash160(data: bytearray) -> bytearray:
+    if hash160_backend == 'openssl':
+        return bytearray(hashlib.new('ripemd160', hashlib.sha256(data).digest()).digest())
     return bytearray(pabtc.ripemd160.ripemd160(hashlib.sha256(data).digest()).digest())
 
 
+def hash160_many(data: typing.List[bytearray]) -> typing.List[bytearray]:
+    # Hash160 of many messages, e.g. the sec encoded public keys of an address pool. Without openssl, the ripemd160
+    # part runs across all sha256 digests at once in numpy lanes if numpy is installed.
+    if hash160_backend == 'openssl':
+        return [hash160(e) for e in data]
+    digest = [hashlib.sha256(e).digest() for e in data]
+    try:
+        return pabtc.ripemd160.ripemd160_many(digest)
+    except ModuleNotFoundError:
+        return [bytearray(pabtc.ripemd160.ripemd160(e).digest()) for e in digest]
+
+
 def hash256(data: bytearray) -> bytearray:
     return bytearray(hashlib.sha256(hashlib.sha256(data).digest()).digest())
 
@@ -64,9 +97,16 @@ class PriKey:
 
     def pubkey(self):
         # Get the ecdsa public key corresponding to the private key.
-        pubkey = pabtc.secp256k1.G * pabtc.secp256k1.Fr(self.n)
+        pubkey = pabtc.secp256k1.mul_g(pabtc.secp256k1.Fr(self.n))
         return PubKey(pubkey.x.x, pubkey.y.x)
 
+    @classmethod
+    def pubkey_many(cls, data: typing.List[int]):
+        # Get the ecdsa public keys corresponding to many private keys. This is much faster than calling pubkey() in a
+        # loop, since all public keys are converted to affine coordinates with a single modular inversion.
+        pubkey = pabtc.secp256k1.mul_g_many([pabtc.secp256k1.Fr(e) for e in data])
+        return [PubKey(e.x.x, e.y.x) for e in pubkey]
+
     def sign_ecdsa(self, data: bytearray) -> typing.Tuple[pabtc.secp256k1.Fr, pabtc.secp256k1.Fr, int]:
         # Sign a 32-byte data segment, returns the signature.
         assert len(data) == 32
@@ -175,6 +215,60 @@ class PubKey:
                 y = -y % pabtc.secp256k1.P
         return PubKey(x, y)
 
+
+class KeyPair:
+    # A private key together with its derived public data. The public key, the BIP340 x-only key and parity, and the
+    # taproot tweaked key pairs are computed once, so signing many messages only pays for the nonce of each signature.
+
+    def __init__(self, prikey: PriKey) -> None:
+        self.prikey = prikey
+        self.pubkey = prikey.pubkey()
+        # Parity of the y coordinate of the public key, see BIP340.
+        self.parity = self.pubkey.y & 1
+        # The x-only public key used by schnorr signatures and taproot.
+        self.xonly = bytearray(self.pubkey.x.to_bytes(32))
+        # Private key and public key negated if needed so that the public key has an even y.
+        self.prikey_implicit = pabtc.secp256k1.Fr(prikey.n)
+        self.pubkey_implicit = self.pubkey.pt()
+        if self.parity:
+            self.prikey_implicit = -self.prikey_implicit
+            self.pubkey_implicit = -self.pubkey_implicit
+        self.tweaked = {}
+
+    def __repr__(self) -> str:
+        return json.dumps(self.json())
+
+    def json(self) -> typing.Dict:
+        return {
+            'prikey': self.prikey.json(),
+            'pubkey': self.pubkey.json(),
+        }
+
+    def sign_ecdsa(self, data: bytearray) -> typing.Tuple[pabtc.secp256k1.Fr, pabtc.secp256k1.Fr, int]:
+        return self.prikey.sign_ecdsa(data)
+
+    def sign_ecdsa_der(self, data: bytearray) -> bytearray:
+        return self.prikey.sign_ecdsa_der(data)
+
+    def sign_schnorr(self, data: bytearray) -> bytearray:
+        # Sign a 32-byte data segment, returns the signature.
+        assert len(data) == 32
+        m = pabtc.secp256k1.Fr(int.from_bytes(data))
+        r, s = pabtc.schnorr.sign_implicit(self.prikey_implicit, self.pubkey_implicit, m)
+        return bytearray(r.x.x.to_bytes(32) + s.x.to_bytes(32))
+
+    def tweak(self, root: bytearray) -> typing.Self:
+        # Get the key pair of the taproot output key committing to the script tree root, which is empty if there is no
+        # script path. The result is cached per root.
+        # See: https://github.com/bitcoin/bips/blob/master/bip-0341.mediawiki#constructing-and-spending-taproot-outputs
+        assert len(root) in [0x00, 0x20]
+        if bytes(root) not in self.tweaked:
+            adjust_prikey_byte = hashtag('TapTweak', self.xonly + root)
+            adjust_prikey = pabtc.secp256k1.Fr(int.from_bytes(adjust_prikey_byte))
+            self.tweaked[bytes(root)] = KeyPair(PriKey((self.prikey_implicit + adjust_prikey).x))
+        return self.tweaked[bytes(root)]
+
+
 # Bitcoin address prefix: https://en.bitcoin.it/wiki/List_of_address_prefixes
 
 
@@ -182,8 +276,7 @@ def address_p2pkh(pubkey: PubKey) -> str:
     # Legacy
     pubkey_hash = hash160(pubkey.sec())
     data = bytearray([pabtc.config.current.prefix.p2pkh]) + pubkey_hash
-    chk4 = hash256(data)[:4]
-    return pabtc.base58.encode(data + chk4)
+    return pabtc.base58.check_encode(data)
 
 
 def address_p2sh(redeem: bytearray) -> str:
@@ -191,8 +284,7 @@ def address_p2sh(redeem: bytearray) -> str:
     # See: https://github.com/bitcoin/bips/blob/master/bip-0016.mediawiki
     redeem_hash = hash160(redeem)
     data = bytearray([pabtc.config.current.prefix.p2sh]) + redeem_hash
-    chk4 = hash256(data)[:4]
-    return pabtc.base58.encode(data + chk4)
+    return pabtc.base58.check_encode(data)
 
 
 def address_p2sh_p2ms(n: int, pubkey: typing.List[PubKey]) -> str:
@@ -224,17 +316,94 @@ def address_p2wpkh(pubkey: PubKey) -> str:
 def address_p2tr(pubkey: PubKey, root: bytearray) -> str:
     # Taproot.
     # See https://github.com/bitcoin/bips/blob/master/bip-0341.mediawiki
-    origin_pubkey = pubkey.pt()
-    if pubkey.y & 1 != 0:
-        # Taproot requires that the y coordinate of the public key is even.
-        origin_pubkey = -origin_pubkey
+    return address_p2tr_output(pubkey, root)[0]
+
+
+def address_p2tr_output(pubkey: PubKey, root: bytearray) -> typing.Tuple[str, PubKey, int]:
+    # Taproot. Returns the address together with the tweaked output public key and the parity of its y coordinate,
+    # which a script path spend needs for the control block.
+    # Taproot requires that the y coordinate of the internal public key is even. Negating it here keeps the cache key
+    # x-only without recovering y from x on a cache miss.
+    y = pubkey.y if pubkey.y & 1 == 0 else pabtc.secp256k1.P - pubkey.y
+    x, y = taproot_tweak_pubkey(pubkey.x, y, bytes(root))
+    addr = pabtc.bech32.encode(pabtc.config.current.prefix.bech32, 1, bytearray(x.to_bytes(32)))
+    return addr, PubKey(x, y), y & 1
+
+
+@functools.lru_cache(maxsize=4096)
+def taproot_tweak_pubkey(x: int, y: int, root: bytes) -> typing.Tuple[int, int]:
+    # Tweak the internal public key, whose y coordinate must be even, with the script tree root. The result is cached,
+    # because the same pair is asked for when generating an address, building its script pubkey and building its
+    # control blocks.
     # There is no script path if root is empty.
     assert len(root) in [0x00, 0x20]
-    adjust_prikey_byte = hashtag('TapTweak', bytearray(origin_pubkey.x.x.to_bytes(32)) + root)
+    assert y & 1 == 0
+    origin_pubkey = PubKey(x, y).pt()
+    adjust_prikey_byte = hashtag('TapTweak', bytearray(x.to_bytes(32)) + root)
     adjust_prikey = pabtc.secp256k1.Fr(int.from_bytes(adjust_prikey_byte))
-    adjust_pubkey = pabtc.secp256k1.G * adjust_prikey
+    adjust_pubkey = pabtc.secp256k1.mul_g(adjust_prikey)
     output_pubkey = origin_pubkey + adjust_pubkey
-    return pabtc.bech32.encode(pabtc.config.current.prefix.bech32, 1, bytearray(output_pubkey.x.x.to_bytes(32)))
+    return output_pubkey.x.x, output_pubkey.y.x
+
+
+def derive_chunk(
+    address: typing.Callable[[PubKey], str],
+    data: typing.List[int],
+) -> typing.List[typing.Tuple[PriKey, PubKey, str]]:
+    # Derive the key pairs and addresses of one chunk of private keys, on the network of pabtc.config.current.
+    pubkey = PriKey.pubkey_many(data)
+    return [(PriKey(n), p, address(p)) for n, p in zip(data, pubkey)]
+
+
+def derive_chunk_process(
+    config: pabtc.config.ObjectDict,
+    address: typing.Callable[[PubKey], str],
+    data: typing.List[int],
+) -> typing.List[typing.Tuple[PriKey, PubKey, str]]:
+    # Derive_chunk in a worker process, which does not share pabtc.config.current with its parent, so the network
+    # config is passed in explicitly. Never call it in the parent process, it would overwrite the caller's config.
+    pabtc.config.current = config
+    return derive_chunk(address, data)
+
+
+def derive_many(
+    prikey: typing.Iterable[int],
+    address: typing.Callable[[PubKey], str],
+    executor: concurrent.futures.Executor | None = None,
+    chunk: int = 1024,
+) -> typing.Iterator[typing.Tuple[PriKey, PubKey, str]]:
+    # Derive (private key, public key, address) triples in bulk, for example to fill a pool of deposit addresses. The
+    # address argument is an address function such as address_p2wpkh, or functools.partial(address_p2tr, root=root).
+    # Private keys are split into chunks; when an executor such as concurrent.futures.ProcessPoolExecutor is given,
+    # chunks are fanned out to it with a bounded number in flight. Results are yielded in input order. Chunks derived
+    # in this process or by a thread pool use pabtc.config.current as it is when they run, while worker processes of
+    # a process pool use the config that was current when derive_many started.
+    assert chunk > 0
+    source = iter(prikey)
+    if executor is None:
+        for data in iter(lambda: list(itertools.islice(source, chunk)), []):
+            yield from derive_chunk(address, data)
+        return
+    if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+        submit = functools.partial(executor.submit, derive_chunk_process, pabtc.config.current)
+    else:
+        submit = functools.partial(executor.submit, derive_chunk)
+    flight = collections.deque()
+    limit = 2 * (os.cpu_count() or 1)
+    for data in iter(lambda: list(itertools.islice(source, chunk)), []):
+        flight.append(submit(address, data))
+        if len(flight) >= limit:
+            yield from flight.popleft().result()
+    while flight:
+        yield from flight.popleft().result()
+
+
+# Precompiled little-endian layouts shared by the transaction encoders and decoders.
+STRUCT_U16 = struct.Struct('<H')
+STRUCT_U32 = struct.Struct('<I')
+STRUCT_U32U8 = struct.Struct('<IB')
+STRUCT_U64 = struct.Struct('<Q')
+STRUCT_U64U8 = struct.Struct('<QB')
 
 
 def compact_size_encode(n: int) -> bytearray:
@@ -254,6 +423,34 @@ def compact_size_encode(n: int) -> bytearray:
     raise Exception
 
 
+def compact_size_pack_into(data: bytearray | memoryview, offset: int, n: int) -> int:
+    # Write the compact size encoding of n at offset of data, returns the offset of the following byte.
+    if n <= 0xfc:
+        data[offset] = n
+        return offset + 1
+    if n <= 0xffff:
+        struct.pack_into('<BH', data, offset, 0xfd, n)
+        return offset + 3
+    if n <= 0xffffffff:
+        struct.pack_into('<BI', data, offset, 0xfe, n)
+        return offset + 5
+    if n <= 0xffffffffffffffff:
+        struct.pack_into('<BQ', data, offset, 0xff, n)
+        return offset + 9
+    raise Exception
+
+
+def compact_size_size(n: int) -> int:
+    # Size of the compact size encoding of n.
+    if n <= 0xfc:
+        return 1
+    if n <= 0xffff:
+        return 3
+    if n <= 0xffffffff:
+        return 5
+    return 9
+
+
 def compact_size_decode(data: bytearray) -> int:
     return compact_size_decode_reader(io.BytesIO(data))
 
@@ -271,6 +468,20 @@ def compact_size_decode_reader(reader: typing.BinaryIO) -> int:
     raise Exception
 
 
+def compact_size_decode_view(data: memoryview, offset: int) -> typing.Tuple[int, int]:
+    # Decode the compact size at offset of data, returns it together with the offset of the following byte.
+    head = data[offset]
+    if head <= 0xfc:
+        return head, offset + 1
+    if head == 0xfd:
+        return STRUCT_U16.unpack_from(data, offset + 1)[0], offset + 3
+    if head == 0xfe:
+        return STRUCT_U32.unpack_from(data, offset + 1)[0], offset + 5
+    if head == 0xff:
+        return STRUCT_U64.unpack_from(data, offset + 1)[0], offset + 9
+    raise Exception
+
+
 def difficulty_target(bits: int) -> int:
     assert bits >= 0x00
     assert bits <= 0xffffffff
@@ -334,7 +545,7 @@ class OutPoint:
         ])
 
     def copy(self) -> typing.Self:
-        return OutPoint(self.txid.copy(), self.vout)
+        return OutPoint(bytearray(self.txid), self.vout)
 
     def json(self) -> typing.Dict:
         return {
@@ -377,7 +588,8 @@ class TxIn:
         ])
 
     def copy(self) -> typing.Self:
-        return TxIn(self.out_point.copy(), self.script_sig.copy(), self.sequence, [e.copy() for e in self.witness])
+        witness = [bytearray(e) for e in self.witness]
+        return TxIn(self.out_point.copy(), bytearray(self.script_sig), self.sequence, witness)
 
     def json(self) -> typing.Dict:
         return {
@@ -405,7 +617,7 @@ class TxOut:
         ])
 
     def copy(self) -> typing.Self:
-        return TxOut(self.value, self.script_pubkey.copy())
+        return TxOut(self.value, bytearray(self.script_pubkey))
 
     def json(self) -> typing.Dict:
         return {
@@ -602,6 +814,10 @@ class Transaction:
         assert len(data) == size
         return hashtag('TapSighash', data)
 
+    def freeze(self) -> 'FrozenTransaction':
+        # Take an immutable snapshot of the transaction, whose txid, wtxid, sizes and weight are computed only once.
+        return FrozenTransaction(bytes(self.serialize()))
+
     def json(self) -> typing.Dict:
         return {
             'version': self.version,
@@ -610,45 +826,92 @@ class Transaction:
             'locktime': self.locktime,
         }
 
-    def serialize_legacy(self) -> bytearray:
-        data = bytearray()
-        data.extend(self.version.to_bytes(4, 'little'))
-        data.extend(compact_size_encode(len(self.vin)))
+    def serialize_into(self, data: bytearray | memoryview, offset: int, segwit: bool) -> int:
+        # Serialize the transaction in the legacy or the segwit format into data at offset, returns the offset of the
+        # following byte. Data must have room for it, see serialize_size.
+        u32 = STRUCT_U32.pack_into
+        u32u8 = STRUCT_U32U8.pack_into
+        u64u8 = STRUCT_U64U8.pack_into
+        u32(data, offset, self.version)
+        offset += 4
+        if segwit:
+            data[offset] = 0x00
+            data[offset + 1] = 0x01
+            offset += 2
+        offset = compact_size_pack_into(data, offset, len(self.vin))
         for i in self.vin:
-            data.extend(i.out_point.txid)
-            data.extend(i.out_point.vout.to_bytes(4, 'little'))
-            data.extend(compact_size_encode(len(i.script_sig)))
-            data.extend(i.script_sig)
-            data.extend(i.sequence.to_bytes(4, 'little'))
-        data.extend(compact_size_encode(len(self.vout)))
+            data[offset:offset+32] = i.out_point.txid
+            n = len(i.script_sig)
+            # Most scripts are shorter than 0xfd bytes, so the vout and the script length are packed together.
+            if n <= 0xfc:
+                u32u8(data, offset + 32, i.out_point.vout, n)
+                offset += 37
+            else:
+                u32(data, offset + 32, i.out_point.vout)
+                offset = compact_size_pack_into(data, offset + 36, n)
+            data[offset:offset+n] = i.script_sig
+            offset += n
+            u32(data, offset, i.sequence)
+            offset += 4
+        offset = compact_size_pack_into(data, offset, len(self.vout))
         for o in self.vout:
-            data.extend(o.value.to_bytes(8, 'little'))
-            data.extend(compact_size_encode(len(o.script_pubkey)))
-            data.extend(o.script_pubkey)
-        data.extend(self.locktime.to_bytes(4, 'little'))
+            n = len(o.script_pubkey)
+            if n <= 0xfc:
+                u64u8(data, offset, o.value, n)
+                offset += 9
+            else:
+                STRUCT_U64.pack_into(data, offset, o.value)
+                offset = compact_size_pack_into(data, offset + 8, n)
+            data[offset:offset+n] = o.script_pubkey
+            offset += n
+        if segwit:
+            for i in self.vin:
+                offset = compact_size_pack_into(data, offset, len(i.witness))
+                for e in i.witness:
+                    offset = compact_size_pack_into(data, offset, len(e))
+                    data[offset:offset+len(e)] = e
+                    offset += len(e)
+        u32(data, offset, self.locktime)
+        return offset + 4
+
+    def serialize_legacy(self) -> bytearray:
+        size = self.serialize_size()[0]
+        data = bytearray(size)
+        end = self.serialize_into(data, 0, False)
+        assert end == size
         return data
 
     def serialize_segwit(self) -> bytearray:
-        data = bytearray()
-        data.extend(self.version.to_bytes(4, 'little'))
-        data.append(0x00)
-        data.append(0x01)
-        data.extend(compact_size_encode(len(self.vin)))
+        size = self.serialize_size()[1]
+        data = bytearray(size)
+        end = self.serialize_into(data, 0, True)
+        assert end == size
+        return data
+
+    def serialize_size(self) -> typing.Tuple[int, int]:
+        # Sizes of the legacy and of the segwit serialization, computed without serializing.
+        size = 8 + compact_size_size(len(self.vin)) + compact_size_size(len(self.vout))
+        wits = 2
         for i in self.vin:
-            data.extend(i.out_point.txid)
-            data.extend(i.out_point.vout.to_bytes(4, 'little'))
-            data.extend(compact_size_encode(len(i.script_sig)))
-            data.extend(i.script_sig)
-            data.extend(i.sequence.to_bytes(4, 'little'))
-        data.extend(compact_size_encode(len(self.vout)))
+            n = len(i.script_sig)
+            size += 41 + n if n <= 0xfc else 40 + compact_size_size(n) + n
+            wits += compact_size_size(len(i.witness))
+            for e in i.witness:
+                n = len(e)
+                wits += 1 + n if n <= 0xfc else compact_size_size(n) + n
         for o in self.vout:
-            data.extend(o.value.to_bytes(8, 'little'))
-            data.extend(compact_size_encode(len(o.script_pubkey)))
-            data.extend(o.script_pubkey)
-        for i in self.vin:
-            data.extend(witness_encode(i.witness))
-        data.extend(self.locktime.to_bytes(4, 'little'))
-        return data
+            n = len(o.script_pubkey)
+            size += 9 + n if n <= 0xfc else 8 + compact_size_size(n) + n
+        return size, size + wits
+
+    def serialize_write(self, w: typing.BinaryIO | socket.socket) -> int:
+        # Serialize the transaction straight into a file-like object or a socket, returns the number of bytes written.
+        data = self.serialize()
+        if isinstance(w, socket.socket):
+            w.sendall(data)
+        else:
+            w.write(data)
+        return len(data)
 
     def serialize(self) -> bytearray:
         # If any inputs have nonempty witnesses, the entire transaction is serialized in the BIP141 Segwit format which
@@ -682,8 +945,9 @@ class Transaction:
         reader = io.BytesIO(data)
         tx = Transaction(0, [], [], 0)
         tx.version = int.from_bytes(reader.read(4), 'little')
-        assert reader.read(1)[0] == 0x00
-        assert reader.read(1)[0] == 0x01
+        marker, flag = reader.read(2)
+        assert marker == 0x00
+        assert flag == 0x01
         for _ in range(compact_size_decode_reader(reader)):
             txid = bytearray(reader.read(32))
             vout = int.from_bytes(reader.read(4), 'little')
@@ -706,6 +970,60 @@ class Transaction:
         else:
             return Transaction.serialize_decode_legacy(data)
 
+    @classmethod
+    def serialize_decode_view(
+        cls,
+        data: bytearray | bytes | memoryview,
+        offset: int = 0,
+        copy: bool = False,
+    ) -> typing.Tuple[typing.Self, int]:
+        # Decode the transaction starting at offset of data, in either the legacy or the segwit format. Returns it
+        # together with the offset of the following byte, so that consecutive transactions of a block can be decoded
+        # without slicing. Txids, scripts and witness items are memoryviews into data unless copy is set, in which case
+        # they are copied into bytearrays. Note that a bytearray can not be resized while views into it exist.
+        view = memoryview(data)
+        u32 = STRUCT_U32.unpack_from
+        u64 = STRUCT_U64.unpack_from
+        tx = Transaction(u32(view, offset)[0], [], [], 0)
+        offset += 4
+        segwit = view[offset] == 0x00
+        if segwit:
+            assert view[offset + 1] == 0x01
+            offset += 2
+        size, offset = compact_size_decode_view(view, offset)
+        for _ in range(size):
+            txid = view[offset:offset+32]
+            vout = u32(view, offset + 32)[0]
+            size, offset = compact_size_decode_view(view, offset + 36)
+            script_sig = view[offset:offset+size]
+            offset += size
+            sequence = u32(view, offset)[0]
+            offset += 4
+            if copy:
+                txid = bytearray(txid)
+                script_sig = bytearray(script_sig)
+            tx.vin.append(TxIn(OutPoint(txid, vout), script_sig, sequence, []))
+        size, offset = compact_size_decode_view(view, offset)
+        for _ in range(size):
+            value = u64(view, offset)[0]
+            size, offset = compact_size_decode_view(view, offset + 8)
+            script_pubkey = view[offset:offset+size]
+            offset += size
+            if copy:
+                script_pubkey = bytearray(script_pubkey)
+            tx.vout.append(TxOut(value, script_pubkey))
+        if segwit:
+            for i in tx.vin:
+                size, offset = compact_size_decode_view(view, offset)
+                for _ in range(size):
+                    size, offset = compact_size_decode_view(view, offset)
+                    i.witness.append(bytearray(view[offset:offset+size]) if copy else view[offset:offset+size])
+                    offset += size
+        tx.locktime = u32(view, offset)[0]
+        offset += 4
+        assert offset <= len(view)
+        return tx, offset
+
     def txid(self) -> bytearray:
         return hash256(self.serialize_legacy())
 
@@ -713,16 +1031,253 @@ class Transaction:
         return math.ceil(self.weight() / 4.0)
 
     def weight(self) -> int:
-        size_legacy = len(self.serialize_legacy())
-        size_segwit = len(self.serialize_segwit()) - size_legacy
-        return size_legacy * 4 + size_segwit
+        # A transaction without witnesses is serialized in the legacy format, so it has no marker, flag or witness
+        # bytes to count.
+        # See: https://github.com/bitcoin/bips/blob/master/bip-0141.mediawiki#transaction-size-calculations
+        size_legacy, size_segwit = self.serialize_size()
+        if not any([e.witness for e in self.vin]):
+            return size_legacy * 4
+        return size_legacy * 3 + size_segwit
+
+
+class TransactionView:
+    # Read only, lazily decoded view of a serialized transaction. A single pass over the data records where every
+    # input, output and witness starts, and fields are only decoded when they are asked for. The txid, wtxid and weight
+    # are computed directly from byte ranges of the data. Decoded scripts and witness items are memoryviews into data.
+
+    def __init__(self, data: bytearray | bytes | memoryview, offset: int = 0) -> None:
+        self.data = memoryview(data)
+        self.head = offset
+        self.version = STRUCT_U32.unpack_from(self.data, offset)[0]
+        offset += 4
+        self.segwit = self.data[offset] == 0x00
+        if self.segwit:
+            assert self.data[offset + 1] == 0x01
+            offset += 2
+        self.body = offset
+        self.vin_offset: typing.List[int] = []
+        self.vout_offset: typing.List[int] = []
+        self.witness_offset: typing.List[int] = []
+        size, offset = compact_size_decode_view(self.data, offset)
+        for _ in range(size):
+            self.vin_offset.append(offset)
+            size, offset = compact_size_decode_view(self.data, offset + 36)
+            offset += size + 4
+        size, offset = compact_size_decode_view(self.data, offset)
+        for _ in range(size):
+            self.vout_offset.append(offset)
+            size, offset = compact_size_decode_view(self.data, offset + 8)
+            offset += size
+        # Offset of the witnesses, which is also the end of the non-witness body.
+        self.wits = offset
+        if self.segwit:
+            for _ in self.vin_offset:
+                self.witness_offset.append(offset)
+                size, offset = compact_size_decode_view(self.data, offset)
+                for _ in range(size):
+                    size, offset = compact_size_decode_view(self.data, offset)
+                    offset += size
+        self.locktime = STRUCT_U32.unpack_from(self.data, offset)[0]
+        # Offset of the byte following the transaction.
+        self.tail = offset + 4
+        assert self.tail <= len(self.data)
+
+    def __len__(self) -> int:
+        return self.tail - self.head
+
+    def serialize(self) -> memoryview:
+        return self.data[self.head:self.tail]
+
+    def size_legacy(self) -> int:
+        # Size of the transaction serialized without witnesses, a.k.a. the stripped size.
+        if self.segwit:
+            return self.tail - self.head - 2 - (self.tail - 4 - self.wits)
+        return self.tail - self.head
+
+    def transaction(self) -> Transaction:
+        # Decode everything into a transaction.
+        return Transaction(self.version, self.vin(), self.vout(), self.locktime)
+
+    def txid(self) -> bytearray:
+        if not self.segwit:
+            return self.wtxid()
+        h = hashlib.sha256()
+        h.update(self.data[self.head:self.head+4])
+        h.update(self.data[self.body:self.wits])
+        h.update(self.data[self.tail-4:self.tail])
+        return bytearray(hashlib.sha256(h.digest()).digest())
+
+    def txin(self, i: int) -> TxIn:
+        offset = self.vin_offset[i]
+        txid = self.data[offset:offset+32]
+        vout = STRUCT_U32.unpack_from(self.data, offset + 32)[0]
+        size, offset = compact_size_decode_view(self.data, offset + 36)
+        script_sig = self.data[offset:offset+size]
+        sequence = STRUCT_U32.unpack_from(self.data, offset + size)[0]
+        return TxIn(OutPoint(txid, vout), script_sig, sequence, self.witness(i))
+
+    def txout(self, i: int) -> TxOut:
+        offset = self.vout_offset[i]
+        value = STRUCT_U64.unpack_from(self.data, offset)[0]
+        size, offset = compact_size_decode_view(self.data, offset + 8)
+        return TxOut(value, self.data[offset:offset+size])
+
+    def vbytes(self) -> int:
+        return math.ceil(self.weight() / 4.0)
+
+    def vin(self) -> typing.List[TxIn]:
+        return [self.txin(i) for i in range(len(self.vin_offset))]
+
+    def vout(self) -> typing.List[TxOut]:
+        return [self.txout(i) for i in range(len(self.vout_offset))]
+
+    def weight(self) -> int:
+        # See: https://github.com/bitcoin/bips/blob/master/bip-0141.mediawiki#transaction-size-calculations
+        return self.size_legacy() * 3 + len(self)
+
+    def witness(self, i: int) -> typing.List[memoryview]:
+        if not self.segwit:
+            return []
+        r = []
+        size, offset = compact_size_decode_view(self.data, self.witness_offset[i])
+        for _ in range(size):
+            size, offset = compact_size_decode_view(self.data, offset)
+            r.append(self.data[offset:offset+size])
+            offset += size
+        return r
+
+    def wtxid(self) -> bytearray:
+        return hash256(self.data[self.head:self.tail])
+
+
+class FrozenTransaction:
+    # Immutable transaction, kept as its serialized bytes. The txid, wtxid, stripped size and weight are computed on
+    # first use and memoized, so it can be used as a key of dicts and sets at no extra cost. Hashes are returned as
+    # bytes rather than bytearray, so that memoized values can not be modified by the caller.
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.view = TransactionView(data)
+        assert self.view.tail == len(data)
+        self.memo: typing.Dict[str, typing.Any] = {}
+
+    def __repr__(self) -> str:
+        return json.dumps(self.json())
+
+    def __eq__(self, other) -> bool:
+        return self.data == other.data
+
+    def __hash__(self) -> int:
+        return hash(self.wtxid())
+
+    def json(self) -> typing.Dict:
+        return self.transaction().json()
+
+    def serialize(self) -> bytes:
+        return self.data
+
+    def size(self) -> int:
+        return len(self.data)
+
+    def size_legacy(self) -> int:
+        # The stripped size, which is the size without witnesses.
+        return self.view.size_legacy()
+
+    def transaction(self) -> Transaction:
+        # Decode into a new mutable transaction.
+        return Transaction.serialize_decode(bytearray(self.data))
+
+    def txid(self) -> bytes:
+        if 'txid' not in self.memo:
+            self.memo['txid'] = bytes(self.view.txid())
+        return self.memo['txid']
+
+    def vbytes(self) -> int:
+        return math.ceil(self.weight() / 4.0)
+
+    def weight(self) -> int:
+        if 'weight' not in self.memo:
+            self.memo['weight'] = self.view.weight()
+        return self.memo['weight']
+
+    def wtxid(self) -> bytes:
+        if 'wtxid' not in self.memo:
+            self.memo['wtxid'] = bytes(self.view.wtxid())
+        return self.memo['wtxid']
+
+
+class TransactionSize:
+    # Incremental size accountant of a transaction. It tracks the legacy and the witness byte counts as inputs and
+    # outputs are added or removed, so the weight of a transaction being built is known without serializing it. Inputs
+    # are described by the sizes of their script sig and witness items, e.g. those of the placeholder inputs built by
+    # signers before signing. The results are the same as those of Transaction.
+    # See: https://github.com/bitcoin/bips/blob/master/bip-0141.mediawiki#transaction-size-calculations
+
+    def __init__(self) -> None:
+        self.vin = 0
+        # Number of inputs with witnesses. The transaction is serialized in the segwit format if there is any.
+        self.vin_witness = 0
+        self.vout = 0
+        # Size of the version, the locktime, the inputs and the outputs.
+        self.body = 8
+        # Size of the segwit marker, the flag and the witnesses.
+        self.wits = 2
+
+    def __repr__(self) -> str:
+        return json.dumps(self.json())
+
+    def json(self) -> typing.Dict:
+        return {
+            'size_legacy': self.size_legacy(),
+            'size_segwit': self.size_segwit(),
+            'weight': self.weight(),
+        }
+
+    def size_legacy(self) -> int:
+        return self.body + compact_size_size(self.vin) + compact_size_size(self.vout)
+
+    def size_segwit(self) -> int:
+        return self.size_legacy() + self.wits
+
+    def vbytes(self) -> int:
+        return math.ceil(self.weight() / 4.0)
+
+    def vin_add(self, script_sig: int, witness: typing.List[int]) -> None:
+        self.vin += 1
+        self.vin_witness += bool(witness)
+        self.body += 40 + compact_size_size(script_sig) + script_sig
+        self.wits += compact_size_size(len(witness)) + sum([compact_size_size(e) + e for e in witness])
+
+    def vin_remove(self, script_sig: int, witness: typing.List[int]) -> None:
+        assert self.vin > 0
+        self.vin -= 1
+        self.vin_witness -= bool(witness)
+        self.body -= 40 + compact_size_size(script_sig) + script_sig
+        self.wits -= compact_size_size(len(witness)) + sum([compact_size_size(e) + e for e in witness])
+
+    def vout_add(self, script_pubkey: int) -> None:
+        self.vout += 1
+        self.body += 8 + compact_size_size(script_pubkey) + script_pubkey
+
+    def vout_remove(self, script_pubkey: int) -> None:
+        assert self.vout > 0
+        self.vout -= 1
+        self.body -= 8 + compact_size_size(script_pubkey) + script_pubkey
+
+    def weight(self) -> int:
+        if self.vin_witness == 0:
+            return self.size_legacy() * 4
+        return self.size_legacy() * 3 + self.size_segwit()
 
 
 def script_pubkey_p2pkh(addr: str) -> bytearray:
-    data = pabtc.base58.decode(addr)
+    data = pabtc.base58.check_decode(addr)
+    assert len(data) == 0x15
     assert data[0] == pabtc.config.current.prefix.p2pkh
-    hash = data[0x01:0x15]
-    assert pabtc.core.hash256(data[0x00:0x15])[:4] == data[0x15:0x19]
+    return script_pubkey_p2pkh_hash(data[0x01:0x15])
+
+
+def script_pubkey_p2pkh_hash(hash: bytearray) -> bytearray:
     return script([
         pabtc.opcode.op_dup,
         pabtc.opcode.op_hash160,
@@ -733,10 +1288,13 @@ def script_pubkey_p2pkh(addr: str) -> bytearray:
 
 
 def script_pubkey_p2sh(addr: str) -> bytearray:
-    data = pabtc.base58.decode(addr)
+    data = pabtc.base58.check_decode(addr)
+    assert len(data) == 0x15
     assert data[0] == pabtc.config.current.prefix.p2sh
-    hash = data[0x01:0x15]
-    assert pabtc.core.hash256(data[0x00:0x15])[:4] == data[0x15:0x19]
+    return script_pubkey_p2sh_hash(data[0x01:0x15])
+
+
+def script_pubkey_p2sh_hash(hash: bytearray) -> bytearray:
     return script([
         pabtc.opcode.op_hash160,
         pabtc.opcode.op_pushdata(hash),
@@ -766,10 +1324,13 @@ def script_pubkey(addr: str) -> bytearray:
             return script_pubkey_p2wpkh(addr)
         if addr[len(pabtc.config.current.prefix.bech32) + 1] == 'p':
             return script_pubkey_p2tr(addr)
-    if pabtc.base58.decode(addr)[0] == pabtc.config.current.prefix.p2pkh:
-        return script_pubkey_p2pkh(addr)
-    if pabtc.base58.decode(addr)[0] == pabtc.config.current.prefix.p2sh:
-        return script_pubkey_p2sh(addr)
+    # Legacy addresses are decoded and their checksum verified only once.
+    data = pabtc.base58.check_decode(addr)
+    assert len(data) == 0x15
+    if data[0] == pabtc.config.current.prefix.p2pkh:
+        return script_pubkey_p2pkh_hash(data[0x01:0x15])
+    if data[0] == pabtc.config.current.prefix.p2sh:
+        return script_pubkey_p2sh_hash(data[0x01:0x15])
     raise Exception
 
 
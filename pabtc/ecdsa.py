@@ -2,7 +2,7 @@ import itertools
 import random
 import typing
 import pabtc.secp256k1
-
+import pabtc.sigcache
 
 
 def sign(prikey: pabtc.secp256k1.Fr, m: pabtc.secp256k1.Fr) -> typing.Tuple[pabtc.secp256k1.Fr, pabtc.secp256k1.Fr, int]:
@@ -10,7 +10,7 @@ def sign(prikey: pabtc.secp256k1.Fr, m: pabtc.secp256k1.Fr) -> typing.Tuple[pabt
     # 4.1.3 Signing Operation
     for _ in itertools.repeat(0):
         k = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
-        R = pabtc.secp256k1.G * k
+        R = pabtc.secp256k1.mul_g(k)
         r = pabtc.secp256k1.Fr(R.x.x)
         if r.x == 0:
             continue
@@ -28,11 +28,24 @@ def sign(prikey: pabtc.secp256k1.Fr, m: pabtc.secp256k1.Fr) -> typing.Tuple[pabt
 def verify(pubkey: pabtc.secp256k1.Pt, m: pabtc.secp256k1.Fr, r: pabtc.secp256k1.Fr, s: pabtc.secp256k1.Fr) -> bool:
     # https://www.secg.org/sec1-v2.pdf
     # 4.1.4 Verifying Operation
+    cache = pabtc.sigcache.cache
+    key = cache.key(
+        b'ecdsa',
+        m.x.to_bytes(32),
+        pubkey.x.x.to_bytes(32),
+        pubkey.y.x.to_bytes(32),
+        r.x.to_bytes(32),
+        s.x.to_bytes(32),
+    )
+    if cache.get(key):
+        return True
     u1 = m / s
     u2 = r / s
-    x = pabtc.secp256k1.G * u1 + pubkey * u2
+    x = pabtc.secp256k1.mul_dual(pabtc.secp256k1.G, u1, pubkey, u2)
     assert x != pabtc.secp256k1.I
     v = pabtc.secp256k1.Fr(x.x.x)
+    if v == r:
+        cache.put(key, True)
     return v == r
 
 
@@ -49,4 +62,4 @@ def pubkey(m: pabtc.secp256k1.Fr, r: pabtc.secp256k1.Fr, s: pabtc.secp256k1.Fr,
     if v & 1 != y.x & 1:
         y = -y
     R = pabtc.secp256k1.Pt(x, y)
-    return (R * s - pabtc.secp256k1.G * m) / r
+    return (R * s - pabtc.secp256k1.mul_g(m)) / r
@@ -5,6 +5,7 @@
 # Pure Python RIPEMD160 implementation. Note that this impelentation is not constant time.
 # Original source: https://github.com/bitcoin/bitcoin/pull/23716
 
+import struct
 import typing
 
 # Message schedule indexes for the l path.
@@ -79,7 +80,7 @@ def function(x: int, y: int, z: int, i: int) -> int:
         return x ^ (y | ~z)
 
 
-def compress(state: typing.List[int], block: typing.List[int]):
+def compress(state: typing.List[int], block: bytearray | bytes | memoryview):
     # Compress state with block."""
     # L path variables.
     h0 = state[0]
@@ -91,7 +92,7 @@ def compress(state: typing.List[int], block: typing.List[int]):
     # R path variables.
     ar, br, cr, dr, er = h0, h1, h2, h3, h4
     # Message variables.
-    x = [int.from_bytes(block[4*i:4*(i+1)], 'little') for i in range(16)]
+    x = struct.unpack('<16I', block)
     # Iterate over the 80 rounds of the compression.
     for j in range(80):
         rn = j >> 4
@@ -119,30 +120,40 @@ class Ripemd160:
         self.state = [0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476, 0xc3d2e1f0]
 
     def update(self, data: bytearray | bytes):
-        self.cache.extend(data)
         self.count += len(data) * 8
-        for _ in range(1 << 32):
-            if len(self.cache) < 64:
-                break
-            full_block = self.cache[0x00:0x40]
-            self.cache = self.cache[0x40:]
-            # Process full 64-byte blocks in the input.
-            compress(self.state, full_block)
+        view = memoryview(data)
+        # Fill up the partial block left over by the previous call.
+        if self.cache:
+            n = min(0x40 - len(self.cache), len(view))
+            self.cache.extend(view[:n])
+            view = view[n:]
+            if len(self.cache) < 0x40:
+                return self
+            compress(self.state, self.cache)
+            self.cache.clear()
+        # Process full 64-byte blocks in the input. Blocks are views into the input, so nothing is copied and the cost
+        # is linear in the input size.
+        size = len(view) & ~0x3f
+        for i in range(0x00, size, 0x40):
+            compress(self.state, view[i:i+0x40])
+        self.cache.extend(view[size:])
         return self
 
     def digest(self) -> bytearray:
         # Construct final blocks (with padding and size).
-        self.cache.append(0x80)
-        size = len(self.cache)
+        final = bytearray(self.cache)
+        final.append(0x80)
+        size = len(final)
         padn = 0x38 if size <= 56 else 0x78
-        self.cache.extend(bytearray(padn - size))
-        self.cache.extend(bytearray(self.count.to_bytes(8, 'little')))
+        final.extend(bytearray(padn - size))
+        final.extend(bytearray(self.count.to_bytes(8, 'little')))
         # Process final blocks.
-        self.update(bytearray())
-        assert len(self.cache) == 0
+        state = self.state.copy()
+        for i in range(0x00, len(final), 0x40):
+            compress(state, final[i:i+0x40])
         # Produce output.
         r = bytearray()
-        for h in self.state:
+        for h in state:
             r.extend(bytearray(h.to_bytes(4, 'little')))
         return r
 
@@ -152,3 +163,52 @@ def ripemd160(data: bytearray | bytes = b'') -> Ripemd160:
     hash = Ripemd160()
     hash.update(data)
     return hash
+
+
+def ripemd160_many(data: typing.List[bytearray | bytes]) -> typing.List[bytearray]:
+    # Hash many messages of the same length at once. Each message must fit in a single block, so it is at most 55 bytes.
+    # The 80 rounds run on numpy uint32 arrays with one lane per message, which amortizes the interpreter overhead of
+    # the pure python compress function over all messages. Numpy is an optional dependency and is imported here.
+    import numpy as np
+    if not data:
+        return []
+    size = len(data[0])
+    assert size <= 55
+    for e in data:
+        assert len(e) == size
+    # Construct the padded blocks and transpose them so that every message word is a contiguous lane array.
+    pad = bytearray([0x80]) + bytearray(55 - size) + bytearray((size * 8).to_bytes(8, 'little'))
+    buf = bytearray().join([bytes(e) + pad for e in data])
+    x = np.ascontiguousarray(np.frombuffer(buf, dtype='<u4').reshape(len(data), 16).T.astype(np.uint32))
+
+    def rol(x, i):
+        return (x << np.uint32(i)) | (x >> np.uint32(32 - i))
+
+    def function(x, y, z, i):
+        if i == 0:
+            return x ^ y ^ z
+        if i == 1:
+            return (x & y) | (~x & z)
+        if i == 2:
+            return (x | ~y) ^ z
+        if i == 3:
+            return (x & z) | (y & ~z)
+        if i == 4:
+            return x ^ (y | ~z)
+
+    h0, h1, h2, h3, h4 = [np.full(len(data), e, dtype=np.uint32) for e in [
+        0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476, 0xc3d2e1f0,
+    ]]
+    al, bl, cl, dl, el = h0, h1, h2, h3, h4
+    ar, br, cr, dr, er = h0, h1, h2, h3, h4
+    kl = [np.uint32(e) for e in KL]
+    kr = [np.uint32(e) for e in KR]
+    for j in range(80):
+        rn = j >> 4
+        al = rol(al + function(bl, cl, dl, 0 + rn) + x[ML[j]] + kl[rn], RL[j]) + el
+        al, bl, cl, dl, el = el, al, bl, rol(cl, 10), dl
+        ar = rol(ar + function(br, cr, dr, 4 - rn) + x[MR[j]] + kr[rn], RR[j]) + er
+        ar, br, cr, dr, er = er, ar, br, rol(cr, 10), dr
+    state = np.stack([h1 + cl + dr, h2 + dl + er, h3 + el + ar, h4 + al + br, h0 + bl + cr])
+    out = np.ascontiguousarray(state.T).astype('<u4').tobytes()
+    return [bytearray(out[i*20:(i+1)*20]) for i in range(len(data))]
@@ -1,14 +1,16 @@
 import hashlib
 import random
+import secrets
 import typing
 import pabtc.secp256k1
+import pabtc.sigcache
 
 # Schnorr Signatures for secp256k1.
 # See: https://github.com/bitcoin/bips/blob/master/bip-0340.mediawiki
 
 
 def prikey_implicit(prikey: pabtc.secp256k1.Fr) -> pabtc.secp256k1.Fr:
-    pubkey = pabtc.secp256k1.G * prikey
+    pubkey = pabtc.secp256k1.mul_g(prikey)
     if pubkey == pubkey_implicit(pubkey):
         return +prikey
     else:
@@ -23,26 +25,113 @@ def pubkey_implicit(pubkey: pabtc.secp256k1.Pt) -> pabtc.secp256k1.Pt:
 
 
 def hash(name: str, data: bytearray) -> bytearray:
-    tag = bytearray(hashlib.sha256(name.encode()).digest())
-    out = bytearray(hashlib.sha256(tag + tag + data).digest())
-    return out
+    # Tagged hash, sha256(sha256(tag) || sha256(tag) || data). The state after absorbing the 64-byte prefix is kept in
+    # hash_midstate and copied, which saves hashing the tag and two sha256 compressions per call.
+    if name not in hash_midstate:
+        hash_midstate_register(name)
+    h = hash_midstate[name].copy()
+    h.update(data)
+    return bytearray(h.digest())
 
 
-def sign(prikey: pabtc.secp256k1.Fr, m: pabtc.secp256k1.Fr) -> typing.Tuple[pabtc.secp256k1.Pt, pabtc.secp256k1.Fr]:
-    prikey = prikey_implicit(prikey)
-    pubkey = pabtc.secp256k1.G * prikey
-    k = prikey_implicit(pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N)))
-    r = pabtc.secp256k1.G * k
+def hash_midstate_register(name: str) -> None:
+    tag = hashlib.sha256(name.encode()).digest()
+    hash_midstate[name] = hashlib.sha256(tag + tag)
+
+
+# Sha256 midstates of tagged hashes, indexed by tag.
+hash_midstate: typing.Dict[str, typing.Any] = {}
+for e in ['BIP0340/aux', 'BIP0340/challenge', 'BIP0340/nonce', 'TapBranch', 'TapLeaf', 'TapSighash', 'TapTweak']:
+    hash_midstate_register(e)
+
+
+def challenge(r: pabtc.secp256k1.Pt, pubkey: pabtc.secp256k1.Pt, m: pabtc.secp256k1.Fr) -> pabtc.secp256k1.Fr:
     e_data = bytearray(r.x.x.to_bytes(32) + pubkey.x.x.to_bytes(32) + m.x.to_bytes(32))
     e_hash = hash('BIP0340/challenge', e_data)
-    e = pabtc.secp256k1.Fr(int.from_bytes(e_hash))
+    return pabtc.secp256k1.Fr(int.from_bytes(e_hash))
+
+
+def sign(prikey: pabtc.secp256k1.Fr, m: pabtc.secp256k1.Fr) -> typing.Tuple[pabtc.secp256k1.Pt, pabtc.secp256k1.Fr]:
+    pubkey = pabtc.secp256k1.mul_g(prikey)
+    if pubkey.y.x & 1:
+        prikey = -prikey
+        pubkey = -pubkey
+    return sign_implicit(prikey, pubkey, m)
+
+
+def sign_implicit(
+    prikey: pabtc.secp256k1.Fr,
+    pubkey: pabtc.secp256k1.Pt,
+    m: pabtc.secp256k1.Fr,
+) -> typing.Tuple[pabtc.secp256k1.Pt, pabtc.secp256k1.Fr]:
+    # Sign with a private key already adjusted by prikey_implicit and its public key, which has an even y. Callers that
+    # sign many messages with the same key compute both once; only the nonce multiplication is left per signature.
+    k = pabtc.secp256k1.Fr(random.randint(1, pabtc.secp256k1.N - 1))
+    r = pabtc.secp256k1.mul_g(k)
+    if r.y.x & 1:
+        k = -k
+        r = -r
+    e = challenge(r, pubkey, m)
     s = k + e * prikey
     return r, s
 
 
 def verify(pubkey: pabtc.secp256k1.Pt, m: pabtc.secp256k1.Fr, r: pabtc.secp256k1.Pt, s: pabtc.secp256k1.Fr):
     pubkey = pubkey_implicit(pubkey)
-    e_data = bytearray(r.x.x.to_bytes(32) + pubkey.x.x.to_bytes(32) + m.x.to_bytes(32))
-    e_hash = hash('BIP0340/challenge', e_data)
-    e = pabtc.secp256k1.Fr(int.from_bytes(e_hash))
-    return pabtc.secp256k1.G * s == r + pubkey * e
+    cache = pabtc.sigcache.cache
+    key = cache.key(
+        b'schnorr',
+        m.x.to_bytes(32),
+        pubkey.x.x.to_bytes(32),
+        r.x.x.to_bytes(32),
+        r.y.x.to_bytes(32),
+        s.x.to_bytes(32),
+    )
+    if cache.get(key):
+        return True
+    e = challenge(r, pubkey, m)
+    # Check s * G - e * P == R, with both multiplications sharing one chain of doublings.
+    if pabtc.secp256k1.mul_dual(pabtc.secp256k1.G, s, pubkey, -e) == r:
+        cache.put(key, True)
+        return True
+    return False
+
+
+def verify_batch(
+    pubkey: typing.List[pabtc.secp256k1.Pt],
+    m: typing.List[pabtc.secp256k1.Fr],
+    r: typing.List[pabtc.secp256k1.Pt],
+    s: typing.List[pabtc.secp256k1.Fr],
+) -> bool:
+    # Verify many signatures at once. Returns true only if every signature is valid.
+    # See: https://github.com/bitcoin/bips/blob/master/bip-0340.mediawiki#batch-verification
+    #
+    # Each equation s_i * G == R_i + e_i * P_i is multiplied by a random factor a_i (with a_1 = 1) and all of them are
+    # summed, so the whole batch reduces to one multi-scalar multiplication. The factors must be unpredictable to the
+    # signers, otherwise invalid signatures could be crafted to cancel each other out.
+    assert len(pubkey) == len(m) == len(r) == len(s)
+    point = [pabtc.secp256k1.G]
+    scale = [pabtc.secp256k1.Fr(0)]
+    for i in range(len(pubkey)):
+        p = pubkey_implicit(pubkey[i])
+        e = challenge(r[i], p, m[i])
+        a = pabtc.secp256k1.Fr(1 if i == 0 else secrets.randbelow(pabtc.secp256k1.N - 1) + 1)
+        scale[0] = scale[0] + a * s[i]
+        point.append(p)
+        scale.append(-a * e)
+        point.append(r[i])
+        scale.append(-a)
+    return pabtc.secp256k1.mul_multi(point, scale) == pabtc.secp256k1.I
+
+
+def verify_batch_locate(
+    pubkey: typing.List[pabtc.secp256k1.Pt],
+    m: typing.List[pabtc.secp256k1.Fr],
+    r: typing.List[pabtc.secp256k1.Pt],
+    s: typing.List[pabtc.secp256k1.Fr],
+) -> typing.List[int]:
+    # Get the indexes of the invalid signatures. The batch is checked as a whole first, and only if that fails does it
+    # fall back to checking the signatures one by one.
+    if verify_batch(pubkey, m, r, s):
+        return []
+    return [i for i in range(len(pubkey)) if not verify(pubkey[i], m[i], r[i], s[i])]
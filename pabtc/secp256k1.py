@@ -1,3 +1,9 @@
+import collections
+import hashlib
+import mmap
+import struct
+import sys
+import threading
 import typing
 
 
@@ -10,6 +16,7 @@ class Fp:
     # Don Johnson, Alfred Menezes and Scott Vanstone, The Elliptic Curve Digital Signature Algorithm (ECDSA)
     # 3.1 The Finite Field Fp
 
+    __slots__ = ['x']
     p = 0
 
     def __init__(self, x: int) -> None:
@@ -24,15 +31,15 @@ class Fp:
 
     def __add__(self, data: typing.Self) -> typing.Self:
         assert self.p == data.p
-        return self.__class__((self.x + data.x) % self.p)
+        return self.__class__(self.x + data.x)
 
     def __sub__(self, data: typing.Self) -> typing.Self:
         assert self.p == data.p
-        return self.__class__((self.x - data.x) % self.p)
+        return self.__class__(self.x - data.x)
 
     def __mul__(self, data: typing.Self) -> typing.Self:
         assert self.p == data.p
-        return self.__class__((self.x * data.x) % self.p)
+        return self.__class__(self.x * data.x)
 
     def __truediv__(self, data: typing.Self) -> typing.Self:
         return self * data ** -1
@@ -44,7 +51,7 @@ class Fp:
         return self
 
     def __neg__(self) -> typing.Self:
-        return self.__class__(self.p - self.x)
+        return self.__class__(-self.x)
 
     @classmethod
     def nil(cls) -> typing.Self:
@@ -70,6 +77,7 @@ N = 0xfffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364141
 
 class Fq(Fp):
 
+    __slots__ = []
     p = P
 
     def __repr__(self) -> str:
@@ -78,6 +86,7 @@ class Fq(Fp):
 
 class Fr(Fp):
 
+    __slots__ = []
     p = N
 
     def __repr__(self) -> str:
@@ -88,11 +97,120 @@ A = Fq(0)
 B = Fq(7)
 
 
+# Integer kernel. The classes below are thin wrappers over these functions, which work on plain ints and tuples so
+# that the hot loops of scalar multiplication allocate no field or point objects and never re-validate intermediate
+# points. A point in jacobian coordinates is a tuple (x, y, z) representing the affine point (x / z², y / z³), and the
+# point at infinity is any tuple with z = 0. Addition and doubling in this form require no modular inversion.
+#
+# https://hyperelliptic.org/EFD/g1p/auto-shortw-jacobian-0.html
+# Explicit-Formulas Database, Short Weierstrass curves with a = 0 in jacobian coordinates
+
+
+def jacobian_add(a: typing.Tuple[int, int, int], b: typing.Tuple[int, int, int]) -> typing.Tuple[int, int, int]:
+    # Add two points. The cost drops from 16 to 11 multiplications when b has z = 1.
+    x1, y1, z1 = a
+    x2, y2, z2 = b
+    if z1 == 0:
+        return b
+    if z2 == 0:
+        return a
+    z1z1 = z1 * z1 % P
+    u2 = x2 * z1z1 % P
+    s2 = y2 * z1 * z1z1 % P
+    if z2 == 1:
+        u1 = x1
+        s1 = y1
+    else:
+        z2z2 = z2 * z2 % P
+        u1 = x1 * z2z2 % P
+        s1 = y1 * z2 * z2z2 % P
+    h = (u2 - u1) % P
+    r = (s2 - s1) % P
+    if h == 0:
+        if r == 0:
+            return jacobian_double(a)
+        return (1, 1, 0)
+    hh = h * h % P
+    hhh = h * hh % P
+    v = u1 * hh % P
+    x3 = (r * r - hhh - 2 * v) % P
+    y3 = (r * (v - x3) - s1 * hhh) % P
+    z3 = h * z1 * z2 % P
+    return (x3, y3, z3)
+
+
+def jacobian_double(a: typing.Tuple[int, int, int]) -> typing.Tuple[int, int, int]:
+    x, y, z = a
+    if z == 0 or y == 0:
+        return (1, 1, 0)
+    yy = y * y % P
+    s = 4 * x * yy % P
+    m = 3 * x * x % P
+    x3 = (m * m - 2 * s) % P
+    y3 = (m * (s - x3) - 8 * yy * yy) % P
+    z3 = 2 * y * z % P
+    return (x3, y3, z3)
+
+
+def jacobian_neg(a: typing.Tuple[int, int, int]) -> typing.Tuple[int, int, int]:
+    return (a[0], P - a[1], a[2])
+
+
+def jacobian_endomorphism(a: typing.Tuple[int, int, int]) -> typing.Tuple[int, int, int]:
+    # Multiply the point by GLV_LAMBDA, which costs a single field multiplication.
+    return (a[0] * GLV_BETA.x % P, a[1], a[2])
+
+
+def jacobian_affine(a: typing.Tuple[int, int, int]) -> typing.Tuple[int, int]:
+    # Convert the point to affine coordinates, where the point at infinity is (0, 0). This is the only place where an
+    # inversion is needed.
+    x, y, z = a
+    if z == 0:
+        return (0, 0)
+    if z == 1:
+        return (x, y)
+    z = pow(z, -1, P)
+    zz = z * z % P
+    return (x * zz % P, y * zz * z % P)
+
+
+def jacobian_affine_many(a: typing.List[typing.Tuple[int, int, int]]) -> typing.List[typing.Tuple[int, int]]:
+    # Convert many points to affine coordinates with a single inversion, using Montgomery's simultaneous inversion
+    # trick: invert the product of all z, then peel the individual inverses off it from the back.
+    # https://en.wikipedia.org/wiki/Modular_multiplicative_inverse#Multiple_inverses
+    prefix = []
+    acc = 1
+    for _, _, z in a:
+        prefix.append(acc)
+        if z != 0:
+            acc = acc * z % P
+    inv = pow(acc, -1, P)
+    r = [(0, 0)] * len(a)
+    for i in reversed(range(len(a))):
+        x, y, z = a[i]
+        if z == 0:
+            continue
+        zi = inv * prefix[i] % P
+        inv = inv * z % P
+        zz = zi * zi % P
+        r[i] = (x * zz % P, y * zz * zi % P)
+    return r
+
+
+def affine_jacobian(a: typing.Tuple[int, int]) -> typing.Tuple[int, int, int]:
+    x, y = a
+    if x == 0 and y == 0:
+        return (1, 1, 0)
+    return (x, y, 1)
+
+
 class Pt:
 
+    __slots__ = ['x', 'y']
+
     def __init__(self, x: Fq, y: Fq) -> None:
-        if x != Fq(0) or y != Fq(0):
-            assert y ** 2 == x ** 3 + A * x + B
+        if x.x != 0 or y.x != 0:
+            assert (y.x * y.x - x.x * x.x * x.x - A.x * x.x - B.x) % P == 0
         self.x = x
         self.y = y
 
@@ -101,46 +219,25 @@ class Pt:
 
     def __eq__(self, data: typing.Self) -> bool:
         return all([
-            self.x == data.x,
-            self.y == data.y,
+            self.x.x == data.x.x,
+            self.y.x == data.y.x,
         ])
 
     def __add__(self, data: typing.Self) -> typing.Self:
-        # https://www.cs.miami.edu/home/burt/learning/Csc609.142/ecdsa-cert.pdf
-        # Don Johnson, Alfred Menezes and Scott Vanstone, The Elliptic Curve Digital Signature Algorithm (ECDSA)
-        # 4.1 Elliptic Curves Over Fp
-        if self.x == Fq(0) and self.y == Fq(0):
-            return data
-        if data.x == Fq(0) and data.y == Fq(0):
-            return self
-        if self.x == data.x and self.y == -data.y:
-            return I
-        x1, x2 = self.x, data.x
-        y1, y2 = self.y, data.y
-        if self.y == data.y:
-            s = (x1 * x1 + x1 * x1 + x1 * x1 + A) / (y1 + y1)
-        else:
-            s = (y2 - y1) / (x2 - x1)
-        x3 = s * s - x1 - x2
-        y3 = s * (x1 - x3) - y1
-        return Pt(x3, y3)
+        return Pt.kernel_decode(jacobian_affine(jacobian_add(self.jacobian(), data.jacobian())))
 
     def __sub__(self, data: typing.Self) -> typing.Self:
         return self + data.__neg__()
 
     def __mul__(self, k: Fr) -> typing.Self:
-        # Point multiplication: Double-and-add
+        # Point multiplication. The generator point uses the fixed-base comb table, any other point uses the windowed
+        # non-adjacent form, split in two half-length scalars by the GLV endomorphism when enabled.
         # https://en.wikipedia.org/wiki/Elliptic_curve_point_multiplication
-        n = k.x
-        result = I
-        addend = self
-        while n:
-            b = n & 1
-            if b == 1:
-                result += addend
-            addend = addend + addend
-            n = n >> 1
-        return result
+        if self == G:
+            return mul_g(k)
+        if GLV:
+            return mul_glv(self, k)
+        return mul_wnaf(self, k, WNAF_WIDTH)
 
     def __truediv__(self, k: Fr) -> typing.Self:
         return self.__mul__(k ** -1)
@@ -149,7 +246,85 @@ class Pt:
         return self
 
     def __neg__(self) -> typing.Self:
-        return Pt(self.x, -self.y)
+        return Pt.kernel_decode((self.x.x, -self.y.x % P))
+
+    def jacobian(self) -> typing.Tuple[int, int, int]:
+        # Convert the point to a kernel tuple in jacobian coordinates.
+        return affine_jacobian((self.x.x, self.y.x))
+
+    def kernel(self) -> typing.Tuple[int, int]:
+        # Convert the point to a kernel tuple in affine coordinates.
+        return (self.x.x, self.y.x)
+
+    @classmethod
+    def kernel_decode(cls, data: typing.Tuple[int, int]) -> typing.Self:
+        # Convert a kernel tuple in affine coordinates to point. The tuple is trusted to be on the curve, since it is
+        # the result of group operations on points that were validated on creation.
+        r = cls.__new__(cls)
+        r.x = Fq(data[0])
+        r.y = Fq(data[1])
+        return r
+
+    def pj(self) -> 'Pj':
+        # Convert the point to jacobian coordinates.
+        return Pj.kernel_decode(self.jacobian())
+
+
+class Pj:
+    # Point in jacobian coordinates, see jacobian_add.
+
+    __slots__ = ['x', 'y', 'z']
+
+    def __init__(self, x: Fq, y: Fq, z: Fq) -> None:
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __repr__(self) -> str:
+        return f'Pj({self.x}, {self.y}, {self.z})'
+
+    def __eq__(self, data: typing.Self) -> bool:
+        return self.pt() == data.pt()
+
+    def __add__(self, data: typing.Self) -> typing.Self:
+        return Pj.kernel_decode(jacobian_add(self.kernel(), data.kernel()))
+
+    def __sub__(self, data: typing.Self) -> typing.Self:
+        return self + data.__neg__()
+
+    def __pos__(self) -> typing.Self:
+        return self
+
+    def __neg__(self) -> typing.Self:
+        return Pj(self.x, -self.y, self.z)
+
+    def double(self) -> typing.Self:
+        return Pj.kernel_decode(jacobian_double(self.kernel()))
+
+    def endomorphism(self) -> typing.Self:
+        return Pj.kernel_decode(jacobian_endomorphism(self.kernel()))
+
+    def kernel(self) -> typing.Tuple[int, int, int]:
+        # Convert the point to a kernel tuple.
+        return (self.x.x, self.y.x, self.z.x)
+
+    @classmethod
+    def kernel_decode(cls, data: typing.Tuple[int, int, int]) -> typing.Self:
+        # Convert a kernel tuple to point.
+        return cls(Fq(data[0]), Fq(data[1]), Fq(data[2]))
+
+    def pt(self) -> Pt:
+        # Convert the point to affine coordinates.
+        return Pt.kernel_decode(jacobian_affine(self.kernel()))
+
+    @classmethod
+    def nil(cls) -> typing.Self:
+        return cls(Fq(1), Fq(1), Fq(0))
+
+
+def pt_many(data: typing.List[Pj]) -> typing.List[Pt]:
+    # Convert many points to affine coordinates with a single modular inversion.
+    return [Pt.kernel_decode(e) for e in jacobian_affine_many([e.kernel() for e in data])]
 
 
 # Identity element
@@ -163,6 +338,361 @@ G = Pt(
     Fq(0x483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8),
 )
 
+# Fixed-base comb table for the generator point. Entry [i][j] holds j * 2^(w * i) * G in affine coordinates (z = 1),
+# so k * G is the sum of one table entry per w-bit window of k and requires no doubling at all. The table is built
+# lazily on first use and shared by the whole process.
+G_TABLE_WIDTH = 4
+G_TABLE: typing.List[typing.List[typing.Tuple[int, int, int]]] = []
+# Guards building and loading of the generator tables. A table is built into a new list and published by rebinding
+# the module global in one assignment, never mutated in place, so a reader that got a table always holds a complete
+# one. table_load may replace the tables with ones of another width, so readers take the width from the table they
+# got rather than from G_TABLE_WIDTH or G_WNAF_WIDTH.
+G_TABLE_LOCK = threading.Lock()
+
+
+def g_table() -> typing.List[typing.List[typing.Tuple[int, int, int]]]:
+    global G_TABLE
+    if G_TABLE:
+        return G_TABLE
+    with G_TABLE_LOCK:
+        if G_TABLE:
+            return G_TABLE
+        w = G_TABLE_WIDTH
+        rows = []
+        base = G.jacobian()
+        for _ in range((N.bit_length() + w - 1) // w):
+            line = [(1, 1, 0)]
+            for _ in range(1, 1 << w):
+                line.append(jacobian_add(line[-1], base))
+            rows.append([affine_jacobian(e) for e in jacobian_affine_many(line)])
+            for _ in range(w):
+                base = jacobian_double(base)
+        G_TABLE = rows
+    return G_TABLE
+
+
+def mul_g_jacobian(n: int) -> typing.Tuple[int, int, int]:
+    table = g_table()
+    w = len(table[0]).bit_length() - 1
+    m = (1 << w) - 1
+    result = (1, 1, 0)
+    for line in table:
+        if n & m:
+            result = jacobian_add(result, line[n & m])
+        n = n >> w
+    return result
+
+
+def mul_g(k: Fr) -> Pt:
+    # Multiply the generator point by k using the fixed-base comb table.
+    return Pt.kernel_decode(jacobian_affine(mul_g_jacobian(k.x)))
+
+
+def mul_g_many(k: typing.List[Fr]) -> typing.List[Pt]:
+    # Multiply the generator point by many scalars. The results share a single modular inversion.
+    return [Pt.kernel_decode(e) for e in jacobian_affine_many([mul_g_jacobian(e.x) for e in k])]
+
+
+# Window width used by Pt.__mul__ for points other than the generator. A width of w stores 2^(w-2) odd multiples of
+# the point and leaves on average one nonzero digit in every w + 1 digits of the scalar.
+WNAF_WIDTH = 5
+
+
+def naf(n: int, w: int) -> typing.List[int]:
+    # Width-w non-adjacent form of n, least significant digit first. Every nonzero digit is odd, lies in the open
+    # interval (-2^(w-1), 2^(w-1)), and is followed by at least w-1 zero digits.
+    # https://en.wikipedia.org/wiki/Elliptic_curve_point_multiplication#w-ary_non-adjacent_form_(wNAF)_method
+    assert n >= 0
+    assert w >= 2
+    r = []
+    m = 1 << w
+    while n:
+        if n & 1:
+            d = n & (m - 1)
+            if d >= m >> 1:
+                d -= m
+            n -= d
+        else:
+            d = 0
+        r.append(d)
+        n >>= 1
+    return r
+
+
+def wnaf_table(p: typing.Tuple[int, int, int], w: int) -> typing.List[typing.Tuple[int, int, int]]:
+    # Odd multiples p, 3p, 5p, ..., (2^(w-1) - 1)p, indexed by d >> 1 for a positive wNAF digit d.
+    table = [p]
+    double = jacobian_double(table[0])
+    for _ in range(1, 1 << (w - 2)):
+        table.append(jacobian_add(table[-1], double))
+    return table
+
+
+def wnaf_sum(
+    term: typing.List[typing.Tuple[int, int, typing.List[typing.Tuple[int, int, int]]]]
+) -> typing.Tuple[int, int, int]:
+    # Compute the sum of k * p over (k, w, wnaf_table(p, w)) terms, where k may be negative. The scalars are recoded in
+    # the non-adjacent form and processed in one interleaved loop, so all multiplications share a single chain of
+    # doublings (Strauss-Shamir trick).
+    digit = []
+    for k, w, _ in term:
+        d = naf(abs(k), w)
+        if k < 0:
+            d = [-e for e in d]
+        digit.append(d)
+    size = max([len(e) for e in digit], default=0)
+    result = (1, 1, 0)
+    for i in reversed(range(size)):
+        result = jacobian_double(result)
+        for d, (_, _, table) in zip(digit, term):
+            if i >= len(d):
+                continue
+            if d[i] > 0:
+                result = jacobian_add(result, table[d[i] >> 1])
+            if d[i] < 0:
+                result = jacobian_add(result, jacobian_neg(table[-d[i] >> 1]))
+    return result
+
+
+def mul_wnaf(p: Pt, k: Fr, w: int) -> Pt:
+    # Multiply an arbitrary point by k with the width-w non-adjacent form. The odd multiples p, 3p, 5p, ... are
+    # precomputed, after which a 256-bit scalar costs about 256 doublings and 256 / (w + 1) additions.
+    return Pt.kernel_decode(jacobian_affine(wnaf_sum([(k.x, w, wnaf_table(p.jacobian(), w))])))
+
+
+# The GLV endomorphism. Beta is a cube root of unity in Fq and lambda a cube root of unity in Fr, chosen such that
+# lambda * (x, y) = (beta * x, y) for every point on the curve. A scalar k is split into k1 + k2 * lambda with k1 and k2
+# about half as long as k, which halves the number of doublings of a variable-base multiplication.
+#
+# https://link.springer.com/chapter/10.1007/3-540-44647-8_11
+# Robert P. Gallant, Robert J. Lambert and Scott A. Vanstone, Faster Point Multiplication on Elliptic Curves with
+# Efficient Endomorphisms
+GLV = True
+GLV_BETA = Fq(0x7ae96a2b657c07106e64479eac3434e99cf0497512f58995c1396c28719501ee)
+GLV_LAMBDA = Fr(0x5363ad4cc05c30e0a5261c028812645a122e22ea20816678df02967c1b23bd72)
+# Short basis of the lattice {(a, b) : a + b * lambda = 0 mod n}.
+GLV_A1 = +0x3086d221a7d46bcde86c90e49284eb15
+GLV_B1 = -0xe4437ed6010e88286f547fa90abfe4c3
+GLV_A2 = +0x114ca50f7a8e2f3f657c1108d9d44cfd8
+GLV_B2 = +0x3086d221a7d46bcde86c90e49284eb15
+
+
+def glv_split(k: int) -> typing.Tuple[int, int]:
+    # Split k into (k1, k2) with k = k1 + k2 * lambda mod n and |k1|, |k2| < 2^129.
+    c1 = (GLV_B2 * k + N // 2) // N
+    c2 = (-GLV_B1 * k + N // 2) // N
+    k1 = k - c1 * GLV_A1 - c2 * GLV_A2
+    k2 = -c1 * GLV_B1 - c2 * GLV_B2
+    return k1, k2
+
+
+def glv_term(
+    k: int,
+    w: int,
+    table: typing.List[typing.Tuple[int, int, int]]
+) -> typing.List[typing.Tuple[int, int, typing.List[typing.Tuple[int, int, int]]]]:
+    # Replace the term k * p by the two half-length terms k1 * p + k2 * (lambda * p).
+    k1, k2 = glv_split(k)
+    return [(k1, w, table), (k2, w, [jacobian_endomorphism(e) for e in table])]
+
+
+def mul_glv(p: Pt, k: Fr) -> Pt:
+    # Multiply an arbitrary point by k with the GLV endomorphism and the width-WNAF_WIDTH non-adjacent form.
+    return Pt.kernel_decode(jacobian_affine(wnaf_sum(glv_term(k.x, WNAF_WIDTH, wnaf_table(p.jacobian(), WNAF_WIDTH)))))
+
+
+# The generator point appears in every signature verification, so its odd multiples are computed once with a wider
+# window than WNAF_WIDTH.
+G_WNAF_WIDTH = 8
+G_WNAF_TABLE: typing.List[typing.Tuple[int, int, int]] = []
+
+
+def g_wnaf_table() -> typing.List[typing.Tuple[int, int, int]]:
+    global G_WNAF_TABLE
+    if G_WNAF_TABLE:
+        return G_WNAF_TABLE
+    with G_TABLE_LOCK:
+        if G_WNAF_TABLE:
+            return G_WNAF_TABLE
+        table = wnaf_table(G.jacobian(), G_WNAF_WIDTH)
+        G_WNAF_TABLE = [affine_jacobian(e) for e in jacobian_affine_many(table)]
+    return G_WNAF_TABLE
+
+
+class WnafCache:
+    # Opt-in LRU cache of odd multiples tables for points that are multiplied over and over, such as the public keys of
+    # a hot wallet or a custody cosigner. A point gets a table of width w once it has been looked up hot times, and
+    # tables are evicted least recently used first when their estimated total size exceeds size bytes. A size of 0
+    # disables the cache.
+
+    def __init__(self, size: int, hot: int = 2, w: int = 8) -> None:
+        self.size = size
+        self.hot = hot
+        self.w = w
+        self.lock = threading.Lock()
+        # Point -> (table, estimated size in bytes).
+        self.table: collections.OrderedDict = collections.OrderedDict()
+        # Point -> number of lookups, for points that are not hot yet. Bounded to the 4096 most recent points.
+        self.count: collections.OrderedDict = collections.OrderedDict()
+        self.used = 0
+
+    def get(self, p: Pt) -> typing.List[typing.Tuple[int, int, int]] | None:
+        # Get the table of p, or none if the cache is disabled or p is not hot yet.
+        if self.size <= 0:
+            return None
+        key = p.kernel()
+        with self.lock:
+            if key in self.table:
+                self.table.move_to_end(key)
+                return self.table[key][0]
+            n = self.count.pop(key, 0) + 1
+            if n < self.hot:
+                self.count[key] = n
+                if len(self.count) > 4096:
+                    self.count.popitem(last=False)
+                return None
+        table = [affine_jacobian(e) for e in jacobian_affine_many(wnaf_table(p.jacobian(), self.w))]
+        size = sys.getsizeof(table) + sum([sys.getsizeof(e) + sum(map(sys.getsizeof, e)) for e in table])
+        with self.lock:
+            if key not in self.table:
+                self.table[key] = (table, size)
+                self.used += size
+            while self.used > self.size and self.table:
+                self.used -= self.table.popitem(last=False)[1][1]
+        return table
+
+
+WNAF_CACHE = WnafCache(0)
+
+
+def wnaf_table_lookup(p: Pt) -> typing.Tuple[int, typing.List[typing.Tuple[int, int, int]]]:
+    # Get the window width and odd multiples table used for p by the multi-scalar routines.
+    if p == G:
+        # The table holds 2^(w - 2) entries.
+        table = g_wnaf_table()
+        return len(table).bit_length() + 1, table
+    table = WNAF_CACHE.get(p)
+    if table:
+        return WNAF_CACHE.w, table
+    return WNAF_WIDTH, wnaf_table(p.jacobian(), WNAF_WIDTH)
+
+
+def mul_dual(p: Pt, a: Fr, q: Pt, b: Fr) -> Pt:
+    # Compute a * p + b * q with both multiplications sharing a single chain of doublings.
+    term = [(a.x, *wnaf_table_lookup(p)), (b.x, *wnaf_table_lookup(q))]
+    if GLV:
+        term = [f for e in term for f in glv_term(*e)]
+    return Pt.kernel_decode(jacobian_affine(wnaf_sum(term)))
+
+
+def mul_multi(p: typing.List[Pt], k: typing.List[Fr]) -> Pt:
+    # Compute the sum of k[i] * p[i] with Pippenger's bucket method. The scalars are cut into c-bit windows. In every
+    # window each point is added once into the bucket selected by its digit, and the buckets are then combined with a
+    # running sum. For n points this costs about 256 / c * (n + 2^(c+1)) additions, against roughly 128 * n for
+    # separate multiplications. Small inputs fall back to the interleaved wNAF of wnaf_sum.
+    # https://cr.yp.to/papers/pippenger.pdf
+    assert len(p) == len(k)
+    term = []
+    for f, e in zip(k, p):
+        if GLV:
+            k1, k2 = glv_split(f.x)
+            term.append((k1, e.jacobian()))
+            term.append((k2, jacobian_endomorphism(e.jacobian())))
+        else:
+            term.append((f.x, e.jacobian()))
+    # Pippenger works on non-negative digits, so move the sign of every scalar onto its point.
+    term = [(-f, jacobian_neg(e)) if f < 0 else (f, e) for f, e in term]
+    if len(term) < 32:
+        term = [(f, WNAF_WIDTH, wnaf_table(e, WNAF_WIDTH)) for f, e in term]
+        return Pt.kernel_decode(jacobian_affine(wnaf_sum(term)))
+    c = max(2, len(term).bit_length() - 3)
+    m = (1 << c) - 1
+    size = max([f.bit_length() for f, _ in term], default=0)
+    result = (1, 1, 0)
+    for w in reversed(range(0, size, c)):
+        for _ in range(c):
+            result = jacobian_double(result)
+        bucket = [(1, 1, 0)] * m
+        for f, e in term:
+            d = (f >> w) & m
+            if d:
+                bucket[d - 1] = jacobian_add(bucket[d - 1], e)
+        # Sum of d * bucket[d - 1], computed as the sum of the running suffix sums.
+        running = (1, 1, 0)
+        for e in reversed(bucket):
+            running = jacobian_add(running, e)
+            result = jacobian_add(result, running)
+    return Pt.kernel_decode(jacobian_affine(result))
+
+
+# The generator tables can be saved to a file and mapped back in, so that short-lived processes and pool workers skip
+# building them. The file starts with a header holding the magic, the format version, both table widths, the curve
+# constants p, n, G.x and G.y and the sha256 of the body. The body holds every table entry as 64 bytes of big-endian
+# affine x and y, with the point at infinity stored as zeros: first the comb table row by row, then the wNAF table.
+TABLE_MAGIC = b'pabtc.secp256k1.table'
+TABLE_VERSION = 1
+TABLE_HEAD = struct.Struct(f'<{len(TABLE_MAGIC)}sIII32s32s32s32s32s')
+
+
+def table_dump(path: str) -> None:
+    # Save the generator tables to path, building them first if needed.
+    g = g_table()
+    g_wnaf = g_wnaf_table()
+    body = bytearray()
+    for e in [f for line in g for f in line] + g_wnaf:
+        x, y = jacobian_affine(e)
+        body.extend(x.to_bytes(32))
+        body.extend(y.to_bytes(32))
+    head = TABLE_HEAD.pack(
+        TABLE_MAGIC,
+        TABLE_VERSION,
+        len(g[0]).bit_length() - 1,
+        len(g_wnaf).bit_length() + 1,
+        P.to_bytes(32),
+        N.to_bytes(32),
+        G.x.x.to_bytes(32),
+        G.y.x.to_bytes(32),
+        hashlib.sha256(body).digest(),
+    )
+    with open(path, 'wb') as f:
+        f.write(head)
+        f.write(body)
+
+
+def table_load(path: str) -> None:
+    # Load the generator tables from a file written by table_dump. This skips the cost of building them, but every
+    # process still holds its own copy: the mapped file is only read once, its entries are converted into python
+    # integer tuples and the mapping is closed. The table widths are taken from the file.
+    global G_TABLE
+    global G_TABLE_WIDTH
+    global G_WNAF_TABLE
+    global G_WNAF_WIDTH
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            magic, version, g_table_width, g_wnaf_width, p, n, gx, gy, hash = TABLE_HEAD.unpack_from(m, 0)
+            assert magic == TABLE_MAGIC
+            assert version == TABLE_VERSION
+            assert p == P.to_bytes(32)
+            assert n == N.to_bytes(32)
+            assert gx == G.x.x.to_bytes(32)
+            assert gy == G.y.x.to_bytes(32)
+            rows = (N.bit_length() + g_table_width - 1) // g_table_width
+            size = rows * (1 << g_table_width) + (1 << (g_wnaf_width - 2))
+            assert len(m) == TABLE_HEAD.size + size * 64
+            with memoryview(m) as body:
+                assert hashlib.sha256(body[TABLE_HEAD.size:]).digest() == hash
+            entry = []
+            for i in range(TABLE_HEAD.size, len(m), 64):
+                entry.append(affine_jacobian((int.from_bytes(m[i:i + 32]), int.from_bytes(m[i + 32:i + 64]))))
+    # The first entry of the wNAF table and the second one of the comb table must both be the generator point.
+    assert entry[1] == entry[rows << g_table_width] == G.jacobian()
+    with G_TABLE_LOCK:
+        G_TABLE_WIDTH = g_table_width
+        G_WNAF_WIDTH = g_wnaf_width
+        G_TABLE = [entry[i:i + (1 << g_table_width)] for i in range(0, rows << g_table_width, 1 << g_table_width)]
+        G_WNAF_TABLE = entry[rows << g_table_width:]
+
+
 if __name__ == '__main__':
     p = G * Fr(42)
     q = G * Fr(24)
@@ -174,3 +704,12 @@ if __name__ == '__main__':
     assert p + r == I
     assert p + I == p
     assert p * Fr(42) == G * Fr(1764)
+    assert mul_g(Fr(42)) == p
+    assert mul_g_many([Fr(42), Fr(0), Fr(24)]) == [p, I, q]
+    assert pt_many([p.pj(), I.pj(), q.pj().double()]) == [p, I, G * Fr(48)]
+    assert mul_dual(G, Fr(42), q, Fr(2)) == G * Fr(90)
+    assert mul_glv(q, Fr(42)) == mul_wnaf(q, Fr(42), WNAF_WIDTH)
+    assert (p.pj() + q.pj()).pt() == p + q
+    assert (p.pj() + p.pj()).pt() == p + p
+    assert (p.pj() + r.pj()).pt() == I
+    assert p.pj().double().pt() == p + p
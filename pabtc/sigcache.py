@@ -0,0 +1,80 @@
+import collections
+import hashlib
+import json
+import secrets
+import sys
+import threading
+import typing
+
+# Signature cache, modeled on the one in bitcoin core. The same signature is often verified many times, for example
+# once when a transaction enters the mempool and again when it is mined. Successful verifications are remembered here
+# so that the later checks cost a hash instead of an elliptic curve multiplication. Failed verifications are never
+# stored.
+# See: https://github.com/bitcoin/bitcoin/blob/master/src/script/sigcache.h
+
+
+class SigCache:
+    # Thread-safe LRU cache. Entries are evicted least recently used first when their estimated size exceeds size
+    # bytes. A size of 0 disables the cache.
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.lock = threading.Lock()
+        self.data: collections.OrderedDict = collections.OrderedDict()
+        self.used = 0
+        self.hit = 0
+        self.miss = 0
+        # Keys are salted so that an attacker can not predict them and craft collisions.
+        self.salt = secrets.token_bytes(32)
+
+    def __repr__(self) -> str:
+        return json.dumps(self.json())
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
+            self.used = 0
+
+    def get(self, key: bytes) -> typing.Any:
+        # Get the value stored under key, or none.
+        with self.lock:
+            if key in self.data:
+                self.hit += 1
+                self.data.move_to_end(key)
+                return self.data[key]
+            self.miss += 1
+            return None
+
+    def json(self) -> typing.Dict:
+        return {
+            'size': self.size,
+            'used': self.used,
+            'hit': self.hit,
+            'miss': self.miss,
+        }
+
+    def key(self, *data: bytes) -> bytes:
+        # Build a cache key from the message digest, public key and signature bytes.
+        h = hashlib.sha256(self.salt)
+        for e in data:
+            h.update(e)
+        return h.digest()
+
+    def put(self, key: bytes, value: typing.Any) -> None:
+        if self.size <= 0:
+            return
+        with self.lock:
+            if key in self.data:
+                return
+            self.data[key] = value
+            self.used += self.sizeof(key, value)
+            while self.used > self.size:
+                k, v = self.data.popitem(last=False)
+                self.used -= self.sizeof(k, v)
+
+    def sizeof(self, key: bytes, value: typing.Any) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+# The default cache used by pabtc.ecdsa and pabtc.schnorr. Set its size to 0 to disable it.
+cache = SigCache(32 * 1024 * 1024)
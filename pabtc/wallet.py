@@ -273,7 +273,8 @@ class Tp2wpkh:
 class Tp2tr:
     def __init__(self, prikey: int, root: bytearray) -> None:
         self.prikey = pabtc.core.PriKey(prikey)
-        self.pubkey = self.prikey.pubkey()
+        self.keypair = pabtc.core.KeyPair(self.prikey)
+        self.pubkey = self.keypair.pubkey
         self.addr = pabtc.core.address_p2tr(self.pubkey, root)
         self.root = root
         self.script = pabtc.core.script_pubkey_p2tr(self.addr)
@@ -292,11 +293,7 @@ class Tp2tr:
 
     def sign(self, tx: pabtc.core.Transaction) -> None:
         # See: https://github.com/bitcoin/bips/blob/master/bip-0341.mediawiki
-        prikey = pabtc.secp256k1.Fr(self.prikey.n)
-        adjust_prikey_byte = pabtc.core.hashtag('TapTweak', bytearray(self.pubkey.x.to_bytes(32)) + self.root)
-        adjust_prikey = pabtc.secp256k1.Fr(int.from_bytes(adjust_prikey_byte))
-        output_prikey = prikey + adjust_prikey
-        output_prikey = pabtc.core.PriKey(output_prikey.x)
+        output_prikey = self.keypair.tweak(self.root)
         for i, e in enumerate(tx.vin):
             m = tx.digest_segwit_v1(i, pabtc.core.sighash_all, bytearray())
             s = output_prikey.sign_schnorr(m) + bytearray([pabtc.core.sighash_all])
@@ -337,11 +334,16 @@ class Wallet:
         tx = pabtc.core.Transaction(2, [], [], 0)
         tx.vout.append(pabtc.core.TxOut(accept_value, accept_script))
         tx.vout.append(pabtc.core.TxOut(change_value, change_script))
+        # Track the size of the transaction as inputs are added, instead of measuring all of it after every input.
+        tx_size = pabtc.core.TransactionSize()
+        tx_size.vout_add(len(accept_script))
+        tx_size.vout_add(len(change_script))
         for utxo in self.unspent():
             txin = self.signer.txin(utxo.out_point)
             tx.vin.append(txin)
+            tx_size.vin_add(len(txin.script_sig), [len(e) for e in txin.witness])
             sender_value += utxo.out.value
-            change_value = sender_value - accept_value - tx.vbytes() * fr
+            change_value = sender_value - accept_value - tx_size.vbytes() * fr
             # How was the dust limit of 546 satoshis was chosen?
             # See: https://bitcoin.stackexchange.com/questions/86068
             if change_value >= 546:
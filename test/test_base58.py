@@ -1,3 +1,4 @@
+import pytest
 import random
 import pabtc
 
@@ -20,3 +21,20 @@ def test_base58_random():
         s = pabtc.base58.encode(b)
         f = pabtc.base58.decode(s)
         assert b == f
+
+
+def test_base58_check():
+    pabtc.config.current = pabtc.config.mainnet
+    addr = '1BgGZ9tcN4rm9KBzDn7KprQz87SZ26SAMH'
+    data = pabtc.base58.check_decode(addr)
+    assert data == bytearray([0x00]) + pabtc.core.hash160(pabtc.core.PriKey(1).pubkey().sec())
+    assert pabtc.base58.check_encode(data) == addr
+    with pytest.raises(AssertionError):
+        pabtc.base58.check_decode(addr[:-1] + '1')
+
+
+def test_base58_check_many():
+    data = [bytearray(random.randbytes(21)) for _ in range(64)]
+    addr = pabtc.base58.check_encode_many(data)
+    assert addr == [pabtc.base58.check_encode(e) for e in data]
+    assert pabtc.base58.check_decode_many(addr) == data
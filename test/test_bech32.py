@@ -1,4 +1,5 @@
 import pytest
+import random
 import pabtc
 
 
@@ -33,6 +34,16 @@ def test_bech32():
             pabtc.bech32.bech32_decode(0, s)
 
 
+def test_bech32_many():
+    prog = [bytearray(random.randbytes(32)) for _ in range(16)]
+    for strict in [True, False]:
+        pabtc.bech32.STRICT = strict
+        addr = pabtc.bech32.encode_many('bc', 1, prog)
+        assert addr == [pabtc.bech32.encode('bc', 1, e) for e in prog]
+        assert pabtc.bech32.decode_many('bc', 1, addr) == prog
+    pabtc.bech32.STRICT = True
+
+
 def test_bech32m():
     # See: https://github.com/bitcoin/bips/blob/master/bip-0350.mediawiki
     for s in [
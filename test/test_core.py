@@ -1,7 +1,29 @@
+import concurrent.futures
+import functools
+import io
 import random
+import socket
 import string
 import pabtc
 
+# Data copied from mastering bitcoin, chapter 6, example 1, alice's serialized transaction.
+# See: https://github.com/bitcoinbook/bitcoinbook/blob/develop/ch06_transactions.adoc
+TX_ALICE = bytearray([
+    0x01, 0x00, 0x00, 0x00, 0x00, 0x01, 0x01, 0xeb, 0x3a, 0xe3, 0x8f, 0x27, 0x19, 0x1a, 0xa5, 0xf3,
+    0x85, 0x0d, 0xc9, 0xca, 0xd0, 0x04, 0x92, 0xb8, 0x8b, 0x72, 0x40, 0x4f, 0x9d, 0xa1, 0x35, 0x69,
+    0x86, 0x79, 0x26, 0x80, 0x41, 0xc5, 0x4a, 0x01, 0x00, 0x00, 0x00, 0x00, 0xff, 0xff, 0xff, 0xff,
+    0x02, 0x20, 0x4e, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x22, 0x51, 0x20, 0x3b, 0x41, 0xda, 0xba,
+    0x4c, 0x9a, 0xce, 0x57, 0x83, 0x69, 0x74, 0x0f, 0x15, 0xe5, 0xec, 0x88, 0x0c, 0x28, 0x27, 0x9e,
+    0xe7, 0xf5, 0x1b, 0x07, 0xdc, 0xa6, 0x9c, 0x70, 0x61, 0xe0, 0x70, 0x68, 0xf8, 0x24, 0x01, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x16, 0x00, 0x14, 0x77, 0x52, 0xc1, 0x65, 0xea, 0x7b, 0xe7, 0x72, 0xb2,
+    0xc0, 0xac, 0xb7, 0xf4, 0xd6, 0x04, 0x7a, 0xe6, 0xf4, 0x76, 0x8e, 0x01, 0x41, 0xcf, 0x5e, 0xfe,
+    0x2d, 0x8e, 0xf1, 0x3e, 0xd0, 0xaf, 0x21, 0xd4, 0xf4, 0xcb, 0x82, 0x42, 0x2d, 0x62, 0x52, 0xd7,
+    0x03, 0x24, 0xf6, 0xf4, 0x57, 0x6b, 0x72, 0x7b, 0x7d, 0x91, 0x8e, 0x52, 0x1c, 0x00, 0xb5, 0x1b,
+    0xe7, 0x39, 0xdf, 0x2f, 0x89, 0x9c, 0x49, 0xdc, 0x26, 0x7c, 0x0a, 0xd2, 0x80, 0xac, 0xa6, 0xda,
+    0xb0, 0xd2, 0xfa, 0x2b, 0x42, 0xa4, 0x51, 0x82, 0xfc, 0x83, 0xe8, 0x17, 0x13, 0x01, 0x00, 0x00,
+    0x00, 0x00,
+])
+
 
 def test_address_p2pkh():
     pabtc.config.current = pabtc.config.mainnet
@@ -65,6 +87,19 @@ def test_address_p2tr():
     assert addr == 'tb1pmfr3p9j00pfxjh0zmgp99y8zftmd3s5pmedqhyptwy6lm87hf5ssk79hv2'
 
 
+def test_address_p2tr_output():
+    pabtc.config.current = pabtc.config.mainnet
+    for n in [1, 6]:
+        pubkey = pabtc.core.PriKey(n).pubkey()
+        root = bytearray(pabtc.core.hashtag('TapLeaf', bytearray([n])))
+        addr, output, parity = pabtc.core.address_p2tr_output(pubkey, root)
+        assert addr == pabtc.core.address_p2tr(pubkey, root)
+        assert output == pabtc.core.KeyPair(pabtc.core.PriKey(n)).tweak(root).pubkey
+        assert output.y & 1 == parity
+        data = pabtc.bech32.decode(pabtc.config.current.prefix.bech32, 1, addr)
+        assert pabtc.core.PubKey.sec_decode(bytearray([0x02 + parity]) + data) == output
+
+
 def test_address_p2wpkh():
     pabtc.config.current = pabtc.config.mainnet
     prikey = pabtc.core.PriKey(1)
@@ -88,6 +123,11 @@ def test_compact_size():
     ]:
         assert pabtc.core.compact_size_encode(n) == b
         assert pabtc.core.compact_size_decode(b) == n
+        assert pabtc.core.compact_size_decode_view(memoryview(b), 0) == (n, len(b))
+        assert pabtc.core.compact_size_size(n) == len(b)
+        data = bytearray(len(b))
+        assert pabtc.core.compact_size_pack_into(data, 0, n) == len(b)
+        assert data == b
 
 
 def test_der():
@@ -99,6 +139,31 @@ def test_der():
         assert s0 == s1
 
 
+def test_derive_many():
+    pabtc.config.current = pabtc.config.mainnet
+    prikey = [random.randint(1, pabtc.secp256k1.N - 1) for _ in range(16)] + [1]
+    result = list(pabtc.core.derive_many(prikey, pabtc.core.address_p2wpkh, chunk=5))
+    assert [e[0].n for e in result] == prikey
+    assert [e[2] for e in result] == [pabtc.core.address_p2wpkh(pabtc.core.PriKey(e).pubkey()) for e in prikey]
+    address = functools.partial(pabtc.core.address_p2tr, root=bytearray())
+    with concurrent.futures.ProcessPoolExecutor(2) as executor:
+        result = list(pabtc.core.derive_many(prikey, address, executor, chunk=5))
+    assert [e[1] for e in result] == [pabtc.core.PriKey(e).pubkey() for e in prikey]
+    assert result[-1][2] == 'bc1pmfr3p9j00pfxjh0zmgp99y8zftmd3s5pmedqhyptwy6lm87hf5sspknck9'
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        result = list(pabtc.core.derive_many(prikey, address, executor, chunk=5))
+    assert result[-1][2] == 'bc1pmfr3p9j00pfxjh0zmgp99y8zftmd3s5pmedqhyptwy6lm87hf5sspknck9'
+    assert pabtc.config.current == pabtc.config.mainnet
+    # Resuming the generator must not overwrite a network switched by the caller in between.
+    g = pabtc.core.derive_many([1, 1], pabtc.core.address_p2wpkh, chunk=1)
+    assert next(g)[2] == 'bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4'
+    pabtc.config.current = pabtc.config.testnet
+    assert next(g)[2] == 'tb1qw508d6qejxtdg4y5r3zarvary0c5xw7kxpjzsx'
+    assert list(g) == []
+    assert pabtc.config.current == pabtc.config.testnet
+    pabtc.config.current = pabtc.config.mainnet
+
+
 def test_difficulty_target():
     assert pabtc.core.difficulty_target(
         0x1b0404cb) == 0x00000000000404CB000000000000000000000000000000000000000000000000
@@ -107,8 +172,41 @@ def test_difficulty_target():
 
 
 def test_hash160():
-    hash = pabtc.core.hash160(bytearray([0, 1, 2, 3]))
-    assert hash.hex() == '3c3fa3d4adcaf8f52d5b1843975e122548269937'
+    backend = pabtc.core.hash160_backend
+    for e in set(['pabtc', backend]):
+        pabtc.core.hash160_backend = e
+        hash = pabtc.core.hash160(bytearray([0, 1, 2, 3]))
+        assert hash.hex() == '3c3fa3d4adcaf8f52d5b1843975e122548269937'
+    pabtc.core.hash160_backend = backend
+
+
+def test_hash160_many():
+    data = [pabtc.core.PriKey(i).pubkey().sec() for i in range(1, 9)]
+    backend = pabtc.core.hash160_backend
+    for e in set(['pabtc', backend]):
+        pabtc.core.hash160_backend = e
+        assert pabtc.core.hash160_many(data) == [pabtc.core.hash160(e) for e in data]
+    pabtc.core.hash160_backend = backend
+    assert pabtc.core.hash160_many([]) == []
+
+
+def test_keypair():
+    pabtc.config.current = pabtc.config.mainnet
+    # The public key of 6 has an odd y.
+    for n in [1, 6, random.randint(1, pabtc.secp256k1.N - 1)]:
+        keypair = pabtc.core.KeyPair(pabtc.core.PriKey(n))
+        assert keypair.pubkey == pabtc.core.PriKey(n).pubkey()
+        assert keypair.xonly == keypair.pubkey.sec()[1:]
+        data = bytearray(random.randbytes(32))
+        sig = keypair.sign_schnorr(data)
+        r = pabtc.core.PubKey.sec_decode(bytearray([0x02]) + sig[:32]).pt()
+        s = pabtc.secp256k1.Fr(int.from_bytes(sig[32:]))
+        assert pabtc.schnorr.verify(keypair.pubkey.pt(), pabtc.secp256k1.Fr(int.from_bytes(data)), r, s)
+        for root in [bytearray(), bytearray(random.randbytes(32))]:
+            output = keypair.tweak(root)
+            assert output is keypair.tweak(root)
+            addr = pabtc.core.address_p2tr(keypair.pubkey, root)
+            assert output.xonly == pabtc.bech32.decode(pabtc.config.current.prefix.bech32, 1, addr)
 
 
 def test_message():
@@ -127,6 +225,12 @@ def test_prikey():
     assert pubkey.y == 0x483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8
 
 
+def test_prikey_pubkey_many():
+    prikey = [random.randint(1, pabtc.secp256k1.N - 1) for _ in range(16)]
+    pubkey = pabtc.core.PriKey.pubkey_many(prikey)
+    assert pubkey == [pabtc.core.PriKey(e).pubkey() for e in prikey]
+
+
 def test_prikey_wif():
     pabtc.config.current = pabtc.config.mainnet
     prikey = pabtc.core.PriKey(1)
@@ -162,23 +266,7 @@ def test_pubkey_sec_read():
 
 
 def test_transaction():
-    # Data copied from mastering bitcoin, chapter 6, example 1, alice's serialized transaction.
-    # See: https://github.com/bitcoinbook/bitcoinbook/blob/develop/ch06_transactions.adoc
-    data = bytearray([
-        0x01, 0x00, 0x00, 0x00, 0x00, 0x01, 0x01, 0xeb, 0x3a, 0xe3, 0x8f, 0x27, 0x19, 0x1a, 0xa5, 0xf3,
-        0x85, 0x0d, 0xc9, 0xca, 0xd0, 0x04, 0x92, 0xb8, 0x8b, 0x72, 0x40, 0x4f, 0x9d, 0xa1, 0x35, 0x69,
-        0x86, 0x79, 0x26, 0x80, 0x41, 0xc5, 0x4a, 0x01, 0x00, 0x00, 0x00, 0x00, 0xff, 0xff, 0xff, 0xff,
-        0x02, 0x20, 0x4e, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x22, 0x51, 0x20, 0x3b, 0x41, 0xda, 0xba,
-        0x4c, 0x9a, 0xce, 0x57, 0x83, 0x69, 0x74, 0x0f, 0x15, 0xe5, 0xec, 0x88, 0x0c, 0x28, 0x27, 0x9e,
-        0xe7, 0xf5, 0x1b, 0x07, 0xdc, 0xa6, 0x9c, 0x70, 0x61, 0xe0, 0x70, 0x68, 0xf8, 0x24, 0x01, 0x00,
-        0x00, 0x00, 0x00, 0x00, 0x16, 0x00, 0x14, 0x77, 0x52, 0xc1, 0x65, 0xea, 0x7b, 0xe7, 0x72, 0xb2,
-        0xc0, 0xac, 0xb7, 0xf4, 0xd6, 0x04, 0x7a, 0xe6, 0xf4, 0x76, 0x8e, 0x01, 0x41, 0xcf, 0x5e, 0xfe,
-        0x2d, 0x8e, 0xf1, 0x3e, 0xd0, 0xaf, 0x21, 0xd4, 0xf4, 0xcb, 0x82, 0x42, 0x2d, 0x62, 0x52, 0xd7,
-        0x03, 0x24, 0xf6, 0xf4, 0x57, 0x6b, 0x72, 0x7b, 0x7d, 0x91, 0x8e, 0x52, 0x1c, 0x00, 0xb5, 0x1b,
-        0xe7, 0x39, 0xdf, 0x2f, 0x89, 0x9c, 0x49, 0xdc, 0x26, 0x7c, 0x0a, 0xd2, 0x80, 0xac, 0xa6, 0xda,
-        0xb0, 0xd2, 0xfa, 0x2b, 0x42, 0xa4, 0x51, 0x82, 0xfc, 0x83, 0xe8, 0x17, 0x13, 0x01, 0x00, 0x00,
-        0x00, 0x00,
-    ])
+    data = TX_ALICE
     tx = pabtc.core.Transaction.serialize_decode(data)
     assert tx.serialize() == data
     assert tx.version == 1
@@ -189,6 +277,124 @@ def test_transaction():
     assert tx.txid() == bytearray.fromhex('7761f9d1ecbcf9c129802aaadfdfec38419aa441519d94bc5b21968630006246')
 
 
+def test_transaction_freeze():
+    data = TX_ALICE
+    tx = pabtc.core.Transaction.serialize_decode(data)
+    frozen = tx.freeze()
+    assert frozen.serialize() == data
+    assert frozen.txid() == tx.txid()
+    assert frozen.wtxid() == pabtc.core.hash256(data)
+    assert frozen.size() == len(data)
+    assert frozen.size_legacy() == len(tx.serialize_legacy())
+    assert frozen.weight() == tx.weight()
+    assert frozen.vbytes() == tx.vbytes()
+    assert frozen.transaction() == tx
+    assert len(set([frozen, tx.freeze(), tx.copy().freeze()])) == 1
+    tx.locktime = 1
+    assert frozen.transaction().locktime == 0
+    assert tx.freeze() != frozen
+    legacy = pabtc.core.Transaction.serialize_decode(tx.serialize_legacy())
+    frozen = legacy.freeze()
+    assert frozen.serialize() == legacy.serialize_legacy()
+    assert frozen.txid() == legacy.txid()
+    assert frozen.wtxid() == legacy.txid()
+    assert frozen.size_legacy() == frozen.size()
+    assert frozen.weight() == legacy.weight() == frozen.size() * 4
+    assert frozen.vbytes() == legacy.vbytes() == frozen.size()
+
+
+def test_transaction_serialize_decode_view():
+    data = TX_ALICE
+    segwit = pabtc.core.Transaction.serialize_decode_segwit(data)
+    legacy = pabtc.core.Transaction.serialize_decode_legacy(segwit.serialize_legacy())
+    block = bytes(data + legacy.serialize_legacy() + data)
+    offset = 0
+    for e in [segwit, legacy, segwit]:
+        for copy in [False, True]:
+            tx, end = pabtc.core.Transaction.serialize_decode_view(block, offset, copy)
+            assert tx == e
+            assert tx.serialize() == e.serialize()
+            assert isinstance(tx.vout[0].script_pubkey, bytearray if copy else memoryview)
+            assert tx.copy() == e
+        offset = end
+    assert offset == len(block)
+
+
+def test_transaction_serialize_into():
+    vin = [
+        pabtc.core.TxIn(pabtc.core.OutPoint(bytearray([i]) * 32, i), bytearray([i]) * i * 40, i, [bytearray(i * 90)])
+        for i in range(8)
+    ]
+    vout = [pabtc.core.TxOut(i, bytearray([i]) * i * 50) for i in range(8)]
+    tx = pabtc.core.Transaction(2, vin, vout, 0)
+    size_legacy, size_segwit = tx.serialize_size()
+    assert pabtc.core.Transaction.serialize_decode_legacy(tx.serialize_legacy()) == pabtc.core.Transaction(2, [
+        pabtc.core.TxIn(e.out_point, e.script_sig, e.sequence, []) for e in vin
+    ], vout, 0)
+    assert pabtc.core.Transaction.serialize_decode_segwit(tx.serialize_segwit()) == tx
+    assert len(tx.serialize_legacy()) == size_legacy
+    assert len(tx.serialize_segwit()) == size_segwit
+    data = bytearray(size_segwit + 2)
+    assert tx.serialize_into(memoryview(data)[1:], 0, True) == size_segwit
+    assert data[1:-1] == tx.serialize_segwit()
+    w = io.BytesIO()
+    assert tx.serialize_write(w) == size_segwit
+    assert w.getvalue() == tx.serialize()
+    a, b = socket.socketpair()
+    with a, b:
+        assert tx.serialize_write(a) == size_segwit
+        r = bytearray()
+        while len(r) < size_segwit:
+            r.extend(b.recv(size_segwit))
+        assert r == tx.serialize()
+
+
+def test_transaction_size():
+    tx = pabtc.core.Transaction(2, [], [], 0)
+    tx_size = pabtc.core.TransactionSize()
+    for i in range(300):
+        script_sig = bytearray(i % 3 * 130)
+        witness = [bytearray(i % 4 * 90) for _ in range(i % 5)]
+        tx.vin.append(pabtc.core.TxIn(pabtc.core.OutPoint(bytearray(32), i), script_sig, 0xffffffff, witness))
+        tx_size.vin_add(len(script_sig), [len(e) for e in witness])
+        tx.vout.append(pabtc.core.TxOut(i, bytearray(i % 2 * 260)))
+        tx_size.vout_add(i % 2 * 260)
+        if i % 7 == 0:
+            tx_size.vout_remove(len(tx.vout.pop().script_pubkey))
+        assert tx_size.size_legacy() == len(tx.serialize_legacy())
+        assert tx_size.size_segwit() == len(tx.serialize_segwit())
+        assert tx_size.weight() == tx.weight()
+        assert tx_size.vbytes() == tx.vbytes()
+    for e in tx.vin[:260]:
+        tx_size.vin_remove(len(e.script_sig), [len(w) for w in e.witness])
+    tx.vin = tx.vin[260:]
+    assert tx_size.weight() == tx.weight()
+
+
+def test_transaction_view():
+    data = TX_ALICE
+    segwit = pabtc.core.Transaction.serialize_decode(data)
+    legacy = pabtc.core.Transaction.serialize_decode(segwit.serialize_legacy())
+    block = bytes(data + legacy.serialize_legacy())
+    view = pabtc.core.TransactionView(block)
+    assert view.tail == len(data)
+    assert view.txid() == segwit.txid()
+    assert view.txid() == bytearray.fromhex('7761f9d1ecbcf9c129802aaadfdfec38419aa441519d94bc5b21968630006246')
+    assert view.wtxid() == pabtc.core.hash256(data)
+    assert view.weight() == segwit.weight()
+    assert view.vbytes() == segwit.vbytes()
+    assert view.txout(1) == segwit.vout[1]
+    assert view.witness(0) == segwit.vin[0].witness
+    assert view.transaction() == segwit
+    assert view.serialize() == data
+    view = pabtc.core.TransactionView(block, view.tail)
+    assert view.tail == len(block)
+    assert view.txid() == segwit.txid()
+    assert view.wtxid() == segwit.txid()
+    assert view.weight() == legacy.weight() == len(segwit.serialize_legacy()) * 4
+    assert view.transaction() == legacy
+
+
 def test_witness():
     for _ in range(256):
         wits = [random.randbytes(random.randint(0, 256)) for _ in range(random.randint(0, 256))]
@@ -1,3 +1,5 @@
+import pytest
+import random
 import pabtc
 
 
@@ -15,3 +17,20 @@ def test_ripemd160():
         (b'a' * 1000, 'aa69deee9a8922e92f8105e007f76110f381e9cf')
     ]:
         assert pabtc.ripemd160.ripemd160(msg).digest().hex() == out
+
+
+def test_ripemd160_update():
+    data = bytes(range(256)) * 4
+    hash = pabtc.ripemd160.Ripemd160()
+    for i in [0, 1, 63, 64, 65, 127, 200, 0, 504]:
+        hash.update(data[:i])
+    full = b''.join([data[:i] for i in [1, 63, 64, 65, 127, 200, 504]])
+    assert hash.digest() == pabtc.ripemd160.ripemd160(full).digest()
+    assert hash.digest() == hash.digest()
+
+
+def test_ripemd160_many():
+    pytest.importorskip('numpy')
+    for size in [0, 1, 20, 32, 33, 55]:
+        data = [random.randbytes(size) for _ in range(16)]
+        assert pabtc.ripemd160.ripemd160_many(data) == [pabtc.ripemd160.ripemd160(e).digest() for e in data]
@@ -1,3 +1,4 @@
+import hashlib
 import random
 import pabtc
 
@@ -9,3 +10,24 @@ def test_schnorr():
         m = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N))
         r, s = pabtc.schnorr.sign(prikey, m)
         assert pabtc.schnorr.verify(pubkey, m, r, s)
+
+
+def test_schnorr_hash():
+    for name in ['TapLeaf', 'pabtc/test']:
+        tag = hashlib.sha256(name.encode()).digest()
+        data = bytearray(range(100))
+        assert pabtc.schnorr.hash(name, data) == hashlib.sha256(tag + tag + data).digest()
+        assert pabtc.schnorr.hash(name, data) == hashlib.sha256(tag + tag + data).digest()
+
+
+def test_schnorr_verify_batch():
+    prikey = [pabtc.secp256k1.Fr(random.randint(1, pabtc.secp256k1.N - 1)) for _ in range(20)]
+    pubkey = [pabtc.secp256k1.G * e for e in prikey]
+    m = [pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1)) for _ in range(20)]
+    r, s = [list(e) for e in zip(*[pabtc.schnorr.sign(e, f) for e, f in zip(prikey, m)])]
+    assert pabtc.schnorr.verify_batch(pubkey, m, r, s)
+    assert pabtc.schnorr.verify_batch_locate(pubkey, m, r, s) == []
+    s[7] = s[7] + pabtc.secp256k1.Fr(1)
+    assert not pabtc.schnorr.verify_batch(pubkey, m, r, s)
+    assert pabtc.schnorr.verify_batch_locate(pubkey, m, r, s) == [7]
+    assert pabtc.schnorr.verify_batch([], [], [], [])
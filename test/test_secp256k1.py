@@ -0,0 +1,144 @@
+import concurrent.futures
+import itertools
+import pytest
+import random
+import pabtc
+
+
+def mul(p: pabtc.secp256k1.Pt, k: pabtc.secp256k1.Fr) -> pabtc.secp256k1.Pt:
+    # Reference affine double-and-add.
+    r = pabtc.secp256k1.I
+    for b in bin(k.x)[2:]:
+        r = r + r
+        if b == '1':
+            r = r + p
+    return r
+
+
+def test_secp256k1_mul():
+    for _ in range(4):
+        k = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
+        p = pabtc.secp256k1.G * pabtc.secp256k1.Fr(random.randint(1, pabtc.secp256k1.N - 1))
+        assert pabtc.secp256k1.G * k == mul(pabtc.secp256k1.G, k)
+        assert p * k == mul(p, k)
+
+
+def test_secp256k1_mul_dual():
+    p = pabtc.secp256k1.G * pabtc.secp256k1.Fr(random.randint(1, pabtc.secp256k1.N - 1))
+    for glv, q in itertools.product([False, True], [pabtc.secp256k1.G, p]):
+        pabtc.secp256k1.GLV = glv
+        a = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
+        b = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
+        assert pabtc.secp256k1.mul_dual(q, a, p, b) == mul(q, a) + mul(p, b)
+        assert pabtc.secp256k1.mul_dual(p, pabtc.secp256k1.Fr(1), p, pabtc.secp256k1.Fr(-1)) == pabtc.secp256k1.I
+    pabtc.secp256k1.GLV = True
+
+
+def test_secp256k1_mul_g():
+    for _ in range(4):
+        k = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
+        assert pabtc.secp256k1.mul_g(k) == mul(pabtc.secp256k1.G, k)
+    assert pabtc.secp256k1.mul_g(pabtc.secp256k1.Fr(0)) == pabtc.secp256k1.I
+    assert pabtc.secp256k1.mul_g(pabtc.secp256k1.Fr(1)) == pabtc.secp256k1.G
+
+
+def test_secp256k1_mul_g_thread():
+    k = [pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1)) for _ in range(8)]
+    r = [mul(pabtc.secp256k1.G, e) for e in k]
+    for _ in range(4):
+        # Every thread races to build the tables from cold.
+        pabtc.secp256k1.G_TABLE.clear()
+        pabtc.secp256k1.G_WNAF_TABLE.clear()
+        with concurrent.futures.ThreadPoolExecutor(len(k)) as executor:
+            assert list(executor.map(pabtc.secp256k1.mul_g, k)) == r
+            assert list(executor.map(lambda e: pabtc.secp256k1.mul_dual(pabtc.secp256k1.G, e, r[0], e), k)) == [
+                mul(pabtc.secp256k1.G, e) + mul(r[0], e) for e in k
+            ]
+        assert len(pabtc.secp256k1.G_WNAF_TABLE) == 1 << (pabtc.secp256k1.G_WNAF_WIDTH - 2)
+
+
+def test_secp256k1_mul_glv():
+    p = pabtc.secp256k1.G * pabtc.secp256k1.Fr(random.randint(1, pabtc.secp256k1.N - 1))
+    assert p.pj().endomorphism().pt() == mul(p, pabtc.secp256k1.GLV_LAMBDA)
+    for _ in range(4):
+        k = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
+        k1, k2 = pabtc.secp256k1.glv_split(k.x)
+        assert abs(k1) < 1 << 129
+        assert abs(k2) < 1 << 129
+        assert pabtc.secp256k1.Fr(k1) + pabtc.secp256k1.Fr(k2) * pabtc.secp256k1.GLV_LAMBDA == k
+        assert pabtc.secp256k1.mul_glv(p, k) == mul(p, k)
+    for k in [0, 1, pabtc.secp256k1.N - 1]:
+        assert pabtc.secp256k1.mul_glv(p, pabtc.secp256k1.Fr(k)) == mul(p, pabtc.secp256k1.Fr(k))
+
+
+def test_secp256k1_mul_multi():
+    for glv, n in itertools.product([False, True], [0, 1, 4, 48]):
+        pabtc.secp256k1.GLV = glv
+        k = [pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1)) for _ in range(n)]
+        p = pabtc.secp256k1.mul_g_many([pabtc.secp256k1.Fr(random.randint(1, pabtc.secp256k1.N - 1)) for _ in range(n)])
+        r = pabtc.secp256k1.I
+        for e, f in zip(p, k):
+            r = r + e * f
+        assert pabtc.secp256k1.mul_multi(p, k) == r
+    pabtc.secp256k1.GLV = True
+
+
+def test_secp256k1_mul_wnaf():
+    p = pabtc.secp256k1.G * pabtc.secp256k1.Fr(random.randint(1, pabtc.secp256k1.N - 1))
+    for w in range(2, 8):
+        k = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
+        assert pabtc.secp256k1.mul_wnaf(p, k, w) == mul(p, k)
+    for k in [0, 1, 2, 3, pabtc.secp256k1.N - 1]:
+        assert pabtc.secp256k1.mul_wnaf(p, pabtc.secp256k1.Fr(k), 5) == mul(p, pabtc.secp256k1.Fr(k))
+
+
+def test_secp256k1_naf():
+    for w in range(2, 8):
+        n = random.randint(0, pabtc.secp256k1.N - 1)
+        assert sum([d << i for i, d in enumerate(pabtc.secp256k1.naf(n, w))]) == n
+
+
+def test_secp256k1_pt_many():
+    k = [pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1)) for _ in range(8)] + [pabtc.secp256k1.Fr(0)]
+    p = [mul(pabtc.secp256k1.G, e) for e in k]
+    assert pabtc.secp256k1.mul_g_many(k) == p
+    assert pabtc.secp256k1.pt_many([e.pj().double() for e in p]) == [e + e for e in p]
+
+
+def test_secp256k1_table(tmp_path):
+    path = str(tmp_path / 'table')
+    pabtc.secp256k1.table_dump(path)
+    pabtc.secp256k1.G_TABLE.clear()
+    pabtc.secp256k1.G_WNAF_TABLE.clear()
+    pabtc.secp256k1.table_load(path)
+    k = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
+    assert pabtc.secp256k1.mul_g(k) == mul(pabtc.secp256k1.G, k)
+    assert pabtc.secp256k1.mul_dual(pabtc.secp256k1.G, k, pabtc.secp256k1.G, k) == mul(pabtc.secp256k1.G, k + k)
+    # Readers take the widths from the tables they hold, not from the module widths.
+    pabtc.secp256k1.G_TABLE_WIDTH = 5
+    pabtc.secp256k1.G_WNAF_WIDTH = 6
+    assert pabtc.secp256k1.mul_g(k) == mul(pabtc.secp256k1.G, k)
+    assert pabtc.secp256k1.mul_dual(pabtc.secp256k1.G, k, pabtc.secp256k1.G, k) == mul(pabtc.secp256k1.G, k + k)
+    pabtc.secp256k1.table_dump(path)
+    pabtc.secp256k1.table_load(path)
+    assert pabtc.secp256k1.G_TABLE_WIDTH == 4
+    assert pabtc.secp256k1.G_WNAF_WIDTH == 8
+    data = bytearray(open(path, 'rb').read())
+    data[-1] ^= 1
+    open(path, 'wb').write(data)
+    with pytest.raises(AssertionError):
+        pabtc.secp256k1.table_load(path)
+
+
+def test_secp256k1_wnaf_cache():
+    cache = pabtc.secp256k1.WNAF_CACHE
+    pabtc.secp256k1.WNAF_CACHE = pabtc.secp256k1.WnafCache(1 << 16)
+    p = [pabtc.secp256k1.G * pabtc.secp256k1.Fr(random.randint(1, pabtc.secp256k1.N - 1)) for _ in range(8)]
+    for _ in range(3):
+        for e in p:
+            a = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
+            b = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
+            assert pabtc.secp256k1.mul_dual(pabtc.secp256k1.G, a, e, b) == mul(pabtc.secp256k1.G, a) + mul(e, b)
+    assert 0 < len(pabtc.secp256k1.WNAF_CACHE.table) < 8
+    assert 0 < pabtc.secp256k1.WNAF_CACHE.used <= 1 << 16
+    pabtc.secp256k1.WNAF_CACHE = cache
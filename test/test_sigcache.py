@@ -0,0 +1,32 @@
+import random
+import pabtc
+
+
+def test_sigcache():
+    cache = pabtc.sigcache.cache
+    pabtc.sigcache.cache = pabtc.sigcache.SigCache(1 << 20)
+    prikey = pabtc.secp256k1.Fr(random.randint(1, pabtc.secp256k1.N - 1))
+    pubkey = pabtc.secp256k1.G * prikey
+    m = pabtc.secp256k1.Fr(random.randint(0, pabtc.secp256k1.N - 1))
+    r, s, v = pabtc.ecdsa.sign(prikey, m)
+    for _ in range(2):
+        assert pabtc.ecdsa.verify(pubkey, m, r, s)
+        assert not pabtc.ecdsa.verify(pubkey, m + pabtc.secp256k1.Fr(1), r, s)
+        assert pabtc.ecdsa.pubkey(m, r, s, v) == pubkey
+    r, s = pabtc.schnorr.sign(prikey, m)
+    for _ in range(2):
+        assert pabtc.schnorr.verify(pubkey, m, r, s)
+        assert not pabtc.schnorr.verify(pubkey, m, r, s + pabtc.secp256k1.Fr(1))
+    assert pabtc.sigcache.cache.hit == 2
+    assert pabtc.sigcache.cache.miss == 6
+    assert len(pabtc.sigcache.cache.data) == 2
+    pabtc.sigcache.cache = cache
+
+
+def test_sigcache_evict():
+    cache = pabtc.sigcache.SigCache(1024)
+    for i in range(256):
+        cache.put(cache.key(i.to_bytes(32)), True)
+        assert cache.used <= 1024
+    assert cache.get(cache.key((255).to_bytes(32)))
+    assert not cache.get(cache.key((0).to_bytes(32)))